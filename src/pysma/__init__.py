@@ -1,19 +1,49 @@
 """PySMA library."""
 
+from pysma.breaker import CircuitBreaker, CircuitState
+from pysma.dashboard import DashboardReader
 from pysma.exceptions import (
     SmaAuthenticationException,
+    SmaCircuitOpenException,
     SmaConnectionException,
     SmaException,
     SmaReadException,
 )
-from pysma.sensor import Sensor, Sensors
+from pysma.fleet import DeviceConfig, PollResult, SMAFleet
+from pysma.layout import JsonLayoutStore, LayoutStore
+from pysma.limiter import AdaptiveLimiter
+from pysma.logger_sync import HighWaterStore, JsonHighWaterStore, LoggerSync
+from pysma.metrics import Instrumentation, Metrics
+from pysma.recorder import SensorRecorder
+from pysma.sensor import Sensor, SensorChange, Sensors
+from pysma.session import JsonSessionStore, SessionStore, SharedSession
 from pysma.sma_webconnect import SMAWebConnect
 
 __all__ = [
+    "AdaptiveLimiter",
+    "CircuitBreaker",
+    "CircuitState",
+    "DashboardReader",
+    "DeviceConfig",
+    "HighWaterStore",
+    "Instrumentation",
+    "JsonHighWaterStore",
+    "JsonLayoutStore",
+    "JsonSessionStore",
+    "LayoutStore",
+    "LoggerSync",
+    "Metrics",
+    "PollResult",
+    "SMAFleet",
     "SMAWebConnect",
     "Sensor",
+    "SensorChange",
+    "SensorRecorder",
     "Sensors",
+    "SessionStore",
+    "SharedSession",
     "SmaAuthenticationException",
+    "SmaCircuitOpenException",
     "SmaConnectionException",
     "SmaException",
     "SmaReadException",
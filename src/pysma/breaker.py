@@ -0,0 +1,93 @@
+"""Circuit breaker for unreachable devices."""
+
+import time
+from enum import StrEnum
+
+from .const import DEFAULT_BREAKER_COOLDOWN, DEFAULT_BREAKER_THRESHOLD
+
+
+class CircuitState(StrEnum):
+    """State of a circuit breaker."""
+
+    CLOSED = "closed"
+    """Requests are sent."""
+    OPEN = "open"
+    """Requests fail immediately."""
+    HALF_OPEN = "half-open"
+    """The cooldown passed, the next request probes the device."""
+
+
+class CircuitBreaker:
+    """Fail fast once a device failed a number of consecutive requests.
+
+    After failure_threshold consecutive failures the circuit opens and requests
+    fail immediately. Once cooldown seconds passed, a single probe is allowed:
+    if it succeeds the circuit closes, otherwise it opens for another cooldown.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+    ):
+        """Init the circuit breaker.
+
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open the
+                circuit.
+            cooldown (float, optional): Seconds before probing an open circuit.
+
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold should be at least 1")
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        """Number of consecutive failures."""
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state of the circuit."""
+        if self._opened_at is None:
+            return CircuitState.CLOSED
+        if self._probing or self.retry_in > 0:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the circuit can be probed, 0 if not open."""
+        if self._opened_at is None:
+            return 0
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def acquire_probe(self) -> bool:
+        """Claim the probe of a half-open circuit.
+
+        Returns:
+            bool: True if the caller should probe, False if the circuit is open
+
+        """
+        if self.state is not CircuitState.HALF_OPEN:
+            return False
+        self._probing = True
+        return True
+
+    def release_probe(self) -> None:
+        """Release the probe without a result, e.g. when it was cancelled."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        """Record a successful request, closes the circuit."""
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Record a failed request, opens the circuit past the threshold."""
+        self.failures += 1
+        self._probing = False
+        if self._opened_at is not None or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
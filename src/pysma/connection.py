@@ -0,0 +1,105 @@
+"""Connections tuned for WebConnect devices.
+
+WebConnect devices close idle connections after a few seconds and are slow to
+complete a TLS handshake. A session created by create_session keeps a few
+connections per device open for less time than the device does, so a closed
+connection is rarely reused, and shares a single SSL context. Call
+SMAWebConnect.warm_up shortly before a read to open a connection in advance.
+"""
+
+import ssl
+from typing import Any
+
+from aiohttp import BaseConnector, ClientSession, TCPConnector
+
+from .const import (
+    DEFAULT_DNS_CACHE_TTL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+)
+
+
+def ssl_context(verify: bool = False) -> ssl.SSLContext:
+    """Create an SSL context for devices.
+
+    Args:
+        verify (bool, optional): Verify the certificate, devices use a self-signed
+            certificate by default. Defaults to False.
+
+    Returns:
+        ssl.SSLContext: The context
+
+    """
+    context = ssl.create_default_context()
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def create_connector(
+    limit_per_host: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+    dns_cache_ttl: int | None = DEFAULT_DNS_CACHE_TTL,
+    verify_ssl: bool = False,
+    **kwargs: Any,
+) -> TCPConnector:
+    """Create a connector for WebConnect devices.
+
+    Args:
+        limit_per_host (int, optional): Connections per device, matching the
+            concurrent requests of SMAWebConnect.limiter.
+        keepalive_timeout (float, optional): Seconds an idle connection is kept,
+            should be less than the device keeps it.
+        dns_cache_ttl (int, optional): Seconds to cache resolved host names.
+        verify_ssl (bool, optional): Verify certificates. Defaults to False.
+        **kwargs: Further TCPConnector arguments
+
+    Returns:
+        TCPConnector: The connector
+
+    """
+    return TCPConnector(
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=dns_cache_ttl,
+        use_dns_cache=dns_cache_ttl is not None,
+        ssl=ssl_context(verify_ssl),
+        **kwargs,
+    )
+
+
+def keepalive_timeout(connector: BaseConnector | None) -> float | None:
+    """Seconds a connector keeps an idle connection open.
+
+    Args:
+        connector (BaseConnector, optional): The connector of a session
+
+    Returns:
+        float: The keep-alive, 0 if connections are closed after every request,
+            None if not known
+
+    """
+    if connector is None:
+        return None
+    if connector.force_close:
+        return 0
+    # Not exposed by aiohttp
+    timeout = getattr(connector, "_keepalive_timeout", None)
+    return timeout if isinstance(timeout, (int, float)) else None
+
+
+def create_session(
+    connector: TCPConnector | None = None, **kwargs: Any
+) -> ClientSession:
+    """Create a client session for WebConnect devices.
+
+    Args:
+        connector (TCPConnector, optional): Defaults to create_connector()
+        **kwargs: Further ClientSession arguments
+
+    Returns:
+        ClientSession: The session, owning the connector
+
+    """
+    return ClientSession(connector=connector or create_connector(), **kwargs)
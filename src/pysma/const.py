@@ -11,6 +11,8 @@ URL_DASH_VALUES = "/dyn/getDashValues.json"
 
 USERS = {"user": "usr", "installer": "istl"}
 
+ERR_SESSION = 401  # invalid or expired session
+
 DEFAULT_TIMEOUT = 5  # seconds, per attempt
 DEFAULT_REQUEST_RETRIES = 3  # attempts per request
 DEFAULT_LANG = "en-US"
@@ -40,3 +42,23 @@ GENERIC_SENSORS = "generic"
 OPTIMIZERS_VIA_INVERTER = "optimizers"
 ENERGY_METER_VIA_INVERTER = "energy-meter"
 DEVICE_INFO = "device-info"
+
+DEFAULT_POLL_INTERVAL = 10  # seconds, between reads of the same device
+DEFAULT_FLEET_CONCURRENCY = 8  # devices read at the same time
+DEFAULT_L10N_CACHE_SIZE = 4  # languages kept in memory
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4  # in-flight requests per device
+DEFAULT_LATENCY_TARGET = 2  # seconds, slower replies reduce the concurrency
+DEFAULT_RETRY_DELAY = 0.5  # seconds, before the first retry
+DEFAULT_RETRY_MAX_DELAY = 5  # seconds, upper bound of the delay between retries
+DEFAULT_BREAKER_THRESHOLD = 5  # consecutive failed requests before failing fast
+DEFAULT_BREAKER_COOLDOWN = 60  # seconds, before probing a failed device again
+DEFAULT_LOGGER_WINDOW = 86400  # seconds of log entries per request in iter_logger
+DEFAULT_LOGGER_CONCURRENCY = 2  # logger windows requested at the same time
+DEFAULT_LOGGER_LOOKBACK = 86400  # seconds of log entries read on the first sync
+DEFAULT_CLOCK_TOLERANCE = 3600  # seconds a high-water mark may be in the future
+DEFAULT_RECORDER_CAPACITY = 8640  # reads kept by a SensorRecorder, 1 day at 10s
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # seconds, metrics
+DEFAULT_KEEPALIVE_TIMEOUT = 4  # seconds, idle connections close before the device does
+DEFAULT_DNS_CACHE_TTL = 300  # seconds
+DEFAULT_SESSION_TIMEOUT = 240  # seconds idle before logging in again, below the device
+DEFAULT_SESSION_LEASE = 300  # seconds a client shares a session, the device timeout
@@ -0,0 +1,85 @@
+"""Read the public dashboard of a device.
+
+The dashboard values (getDashValues) are served without login and contain a
+small fixed set of keys, such as the current power and the yields. Reading them
+with SMAWebConnect.read iterates all sensors on every poll; DashboardReader
+resolves the sensors once and only decodes those on later polls.
+"""
+
+import logging
+from typing import TYPE_CHECKING
+
+from .sensor import Sensor, Sensors
+
+if TYPE_CHECKING:
+    from .sma_webconnect import SMAWebConnect
+
+_LOG = logging.getLogger(__name__)
+
+
+class DashboardReader:
+    """Read dashboard values into a Sensors set, without login.
+
+    The sensors served by the dashboard are resolved from the first reply.
+    Sensors added or enabled later are not read, call reset to resolve again.
+    """
+
+    def __init__(self, sma: "SMAWebConnect", sensors: Sensors):
+        """Init the reader.
+
+        Args:
+            sma (SMAWebConnect): The device, a password is not required
+            sensors (Sensors): Sensors to read, those not on the dashboard are ignored
+
+        """
+        self.sma = sma
+        self.sensors = sensors
+        self._plan: tuple[tuple[str, tuple[Sensor, ...]], ...] | None = None
+
+    @property
+    def resolved(self) -> list[Sensor] | None:
+        """Sensors served by the dashboard, None before the first read."""
+        if self._plan is None:
+            return None
+        return [sen for _, group in self._plan for sen in group]
+
+    def reset(self) -> None:
+        """Resolve the sensors again on the next read."""
+        self._plan = None
+
+    def _resolve(self, result_body: dict) -> tuple[tuple[str, tuple[Sensor, ...]], ...]:
+        """Group the enabled sensors by the keys present in result_body."""
+        plan = []
+        missing = []
+        for key in dict.fromkeys(sen.key for sen in self.sensors if sen.enabled):
+            group = tuple(sen for sen in self.sensors.by_key(key) if sen.enabled)
+            if key in result_body:
+                plan.append((key, group))
+            else:
+                missing.extend(sen.name for sen in group)
+        if missing:
+            _LOG.debug("%s: Not on the dashboard: %s", self.sma.url, ",".join(missing))
+        return tuple(plan)
+
+    async def read(self) -> bool:
+        """Read the dashboard values.
+
+        Returns:
+            bool: reading was successful
+
+        """
+        result_body = await self.sma.read_dash_values()
+        if self._plan is None:
+            self._plan = self._resolve(result_body)
+        l10n = await self.sma.read_l10n()
+        for key, group in self._plan:
+            if key not in result_body:
+                # As read, a value missing from the reply is left unchanged
+                continue
+            res = result_body[key]
+            for sen in group:
+                sen.decode_result(res, l10n)
+
+        if self.sensors.recorder is not None:
+            self.sensors.recorder.record()
+        return True
@@ -15,3 +15,7 @@ class SmaReadException(SmaException):
 
 class SmaConnectionException(SmaException):
     """An error occurred in the connection with the device."""
+
+
+class SmaCircuitOpenException(SmaConnectionException):
+    """The device failed repeatedly, requests are not sent until it recovers."""
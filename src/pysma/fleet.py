@@ -0,0 +1,288 @@
+"""Poll a fleet of SMA WebConnect devices concurrently."""
+
+import asyncio
+import contextlib
+import inspect
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Self
+
+from aiohttp import ClientSession
+
+from .connection import create_connector, create_session, keepalive_timeout
+from .const import DEFAULT_FLEET_CONCURRENCY, DEFAULT_LANG, DEFAULT_POLL_INTERVAL
+from .exceptions import SmaException
+from .layout import LayoutStore
+from .retry import RetryPolicy, request_budget
+from .sensor import Sensors
+from .session import SessionStore
+from .sma_webconnect import SMAWebConnect
+
+_LOG = logging.getLogger(__name__)
+
+
+@dataclass
+class DeviceConfig:
+    """Configuration of a single device in a fleet."""
+
+    url: str
+    """Url or IP address of device"""
+    password: str | None = None
+    """Password to use during login."""
+    group: str = "user"
+    """Username to use during login."""
+    lang: str = DEFAULT_LANG
+    """Language code of file to retrieve."""
+    interval: float = DEFAULT_POLL_INTERVAL
+    """Seconds between reads of this device, also the budget for retries."""
+    retry: RetryPolicy | None = None
+    """Retry policy of requests to this device, the default policy if None."""
+    sensors: Sensors | None = None
+    """Sensors to read, discovered with get_sensors() if None."""
+    warm_up: float | None = None
+    """Seconds before every poll to open a connection, see SMAWebConnect.warm_up.
+    Less than the keep-alive of the connector of the session."""
+
+
+@dataclass
+class FleetDevice:
+    """A device in a fleet and its connection."""
+
+    config: DeviceConfig
+    sma: SMAWebConnect
+    sensors: Sensors | None = None
+
+    async def reset(self) -> None:
+        """Drop the session, the next read will log in again."""
+        with contextlib.suppress(SmaException):
+            await self.sma.close_session()
+
+
+@dataclass(slots=True)
+class PollResult:
+    """Result of reading one device."""
+
+    device: FleetDevice
+    timestamp: float
+    """Time the read started, as returned by time.time()."""
+    duration: float
+    """Seconds the read took, including waiting for a free slot."""
+    error: SmaException | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Read was successful."""
+        return self.error is None
+
+
+ResultCallback = Callable[[PollResult], Awaitable[None] | None]
+
+
+class SMAFleet:
+    """Read many SMA WebConnect devices concurrently.
+
+    Every device is polled by its own task at its own interval, so a slow or
+    offline device never delays the others. At most max_concurrency reads are
+    in flight at the same time. Results are passed to on_result or, without a
+    callback, can be consumed with ``async for result in fleet``.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[DeviceConfig],
+        session: ClientSession | None = None,
+        max_concurrency: int = DEFAULT_FLEET_CONCURRENCY,
+        on_result: ResultCallback | None = None,
+        layout_store: LayoutStore | None = None,
+        session_store: SessionStore | None = None,
+        verify_ssl: bool = False,
+    ):
+        """Init the fleet.
+
+        Args:
+            devices (Iterable[DeviceConfig]): Devices to poll
+            session (ClientSession, optional): aiohttp client session shared by all
+                devices. A session is created with connection.create_session (and
+                closed on stop) if None.
+            max_concurrency (int, optional): Maximum number of devices read at the
+                same time. Defaults to DEFAULT_FLEET_CONCURRENCY.
+            on_result (ResultCallback, optional): Called with every PollResult.
+            layout_store (LayoutStore, optional): Store for discovered sensor layouts,
+                see SMAWebConnect.get_sensors.
+            session_store (SessionStore, optional): Shares the sessions with other
+                clients of the devices, see pysma.session.
+            verify_ssl (bool, optional): Verify the certificates of the devices, for
+                the session created by the fleet. Defaults to False.
+
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency should be at least 1")
+        self.configs = list(devices)
+        self.session = session
+        self.on_result = on_result
+        self.layout_store = layout_store
+        self.session_store = session_store
+        self.verify_ssl = verify_ssl
+        self.devices: list[FleetDevice] = []
+        self._own_session = session is None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queue: asyncio.Queue[PollResult] | None = (
+            None if on_result else asyncio.Queue()
+        )
+        self._tasks: list[asyncio.Task] = []
+
+    def _setup(self) -> None:
+        """Create the session and a connection for every device.
+
+        Raises:
+            ValueError: A warm up is not less than the keep-alive of the session,
+                the warmed up connection would be closed before the poll
+
+        """
+        if self.session is None:
+            self.session = create_session(create_connector(verify_ssl=self.verify_ssl))
+        if self.devices:
+            return
+        keepalive = keepalive_timeout(self.session.connector)
+        for config in self.configs:
+            if config.warm_up and keepalive is not None and config.warm_up >= keepalive:
+                raise ValueError(
+                    f"warm_up of {config.url} should be less than the keep-alive "
+                    f"of the session ({keepalive}s), got {config.warm_up}s"
+                )
+        for config in self.configs:
+            sma = SMAWebConnect(
+                self.session,
+                config.url,
+                password=config.password,
+                group=config.group,
+                lang=config.lang,
+                session_store=self.session_store,
+            )
+            if config.retry is not None:
+                sma.retry = config.retry
+            self.devices.append(FleetDevice(config, sma, config.sensors))
+
+    async def poll(self, device: FleetDevice) -> PollResult:
+        """Read a single device, discovering its sensors on the first read.
+
+        Errors are returned in the PollResult and the session is dropped,
+        without logging out, so the next poll logs in again.
+        """
+        start = time.time()
+        start_mono = time.monotonic()
+        error: SmaException | None = None
+        async with self._semaphore:
+            try:
+                with request_budget(device.config.interval):
+                    if device.sensors is None:
+                        device.sensors = await device.sma.get_sensors(self.layout_store)
+                    await device.sma.read(device.sensors)
+            except SmaException as exc:
+                error = exc
+        if error is not None:
+            _LOG.debug("Reading %s failed: %s", device.config.url, error)
+            # After a read error the session is already closed, after a
+            # connection error a logout would wait for the device again
+            await device.sma.close_session(logout=False)
+        return PollResult(device, start, time.monotonic() - start_mono, error=error)
+
+    async def poll_once(self) -> list[PollResult]:
+        """Read all devices concurrently, once.
+
+        Returns:
+            list[PollResult]: A result for every device, in device order
+
+        """
+        self._setup()
+        return list(
+            await asyncio.gather(*(self._poll_safe(dev) for dev in self.devices))
+        )
+
+    async def _poll_safe(self, device: FleetDevice) -> PollResult:
+        """Poll a device, returning unexpected errors in the PollResult."""
+        start = time.time()
+        start_mono = time.monotonic()
+        try:
+            return await self.poll(device)
+        except Exception as exc:
+            _LOG.exception("Unexpected error polling %s", device.config.url)
+            error = SmaException(f"Unexpected error polling {device.config.url}")
+            error.__cause__ = exc
+            return PollResult(device, start, time.monotonic() - start_mono, error=error)
+
+    async def _deliver(self, result: PollResult) -> None:
+        if self.on_result is None:
+            if self._queue is not None:
+                self._queue.put_nowait(result)
+            return
+        try:
+            res = self.on_result(result)
+            if inspect.isawaitable(res):
+                await res
+        except Exception:
+            _LOG.exception("Error in result callback for %s", result.device.config.url)
+
+    async def _run(self, device: FleetDevice) -> None:
+        """Poll a device at its interval, skipping polls that were overrun."""
+        loop = asyncio.get_running_loop()
+        next_poll = loop.time()
+        while True:
+            try:
+                await self._deliver(await self.poll(device))
+            except Exception:
+                _LOG.exception("Unexpected error polling %s", device.config.url)
+            next_poll += device.config.interval
+            now = loop.time()
+            next_poll = max(next_poll, now)
+            warm_up = device.config.warm_up
+            if warm_up and next_poll - warm_up > now:
+                await asyncio.sleep(next_poll - warm_up - now)
+                await device.sma.warm_up()
+                now = loop.time()
+            await asyncio.sleep(max(next_poll - now, 0))
+
+    async def start(self) -> None:
+        """Start polling all devices."""
+        if self._tasks:
+            return
+        self._setup()
+        self._tasks = [
+            asyncio.create_task(self._run(dev), name=f"pysma {dev.config.url}")
+            for dev in self.devices
+        ]
+
+    async def stop(self) -> None:
+        """Stop polling and log out of all devices."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*(dev.reset() for dev in self.devices))
+        if self._own_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+            self.devices = []
+
+    async def __aenter__(self) -> Self:
+        """Start polling."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Stop polling."""
+        await self.stop()
+
+    async def __aiter__(self) -> AsyncIterator[PollResult]:
+        """Iterate over poll results as they arrive.
+
+        Raises:
+            RuntimeError: Results are delivered to on_result
+
+        """
+        if self._queue is None:
+            raise RuntimeError("Results are delivered to on_result")
+        while True:
+            yield await self._queue.get()
@@ -1,8 +1,23 @@
 """Helper functions for the pysma library."""
 
+import contextlib
+import json
+import logging
+import tempfile
+import threading
+from collections.abc import Callable, Collection, Iterator
 from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
 from typing import Any
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+_LOG = logging.getLogger(__name__)
+
 
 def version_int_to_string(version_integer: Any) -> str:
     """Convert a version integer to a readable string.
@@ -32,6 +47,111 @@ def ensure_string(value: Any) -> str:
     return str(value) if value is not None else ""
 
 
+JsonLoads = Callable[[bytes], Any]
+
+JSON_DECODERS = ("orjson", "msgspec", "json")
+
+
+def json_decoder(name: str | None = None) -> JsonLoads:
+    """Get a json decoder.
+
+    Args:
+        name (str, optional): One of JSON_DECODERS. Defaults to the first installed.
+
+    Raises:
+        ValueError: The decoder is unknown
+        ImportError: The decoder is not installed
+
+    Returns:
+        JsonLoads: Callable decoding bytes, raising ValueError on invalid json
+
+    """
+    if name is None:
+        for candidate in JSON_DECODERS:
+            try:
+                return json_decoder(candidate)
+            except ImportError:
+                continue
+    if name == "orjson":
+        import orjson  # noqa: PLC0415
+
+        return orjson.loads
+    if name == "msgspec":
+        import msgspec  # noqa: PLC0415
+
+        return msgspec.json.Decoder().decode
+    if name == "json":
+        return json.loads
+    raise ValueError(f"Unknown json decoder {name}, expected one of {JSON_DECODERS}")
+
+
+@cache
+def _raw_reply_decoder() -> Any:
+    """Get a msgspec decoder for replies, keeping the value of every key raw."""
+    import msgspec  # noqa: PLC0415
+
+    class RawReply(msgspec.Struct):
+        result: dict[str, dict[str, msgspec.Raw]] | None = None
+        err: Any = None
+
+    return msgspec.json.Decoder(RawReply)
+
+
+def values_decoder(keys: Collection[str], loads: JsonLoads = json.loads) -> JsonLoads:
+    """Get a decoder for replies to getValues, that only keeps the requested keys.
+
+    If msgspec is installed, the values of other keys are skipped without
+    decoding them. Otherwise the reply is decoded by loads and filtered.
+
+    Args:
+        keys (Collection[str]): Keys to keep
+        loads (JsonLoads, optional): Decoder for replies in another format
+
+    Returns:
+        JsonLoads: Callable decoding bytes, raising ValueError on invalid json
+
+    """
+    wanted = frozenset(keys)
+    try:
+        decoder = _raw_reply_decoder()
+        import msgspec  # noqa: PLC0415
+    except ImportError:
+
+        def _filter(data: bytes) -> Any:
+            body = loads(data)
+            result = body.get("result") if isinstance(body, dict) else None
+            if isinstance(result, dict):
+                for uid, values in result.items():
+                    if isinstance(values, dict):
+                        result[uid] = {
+                            key: val for key, val in values.items() if key in wanted
+                        }
+            return body
+
+        return _filter
+
+    decode_raw = msgspec.json.decode
+
+    def _decode(data: bytes) -> Any:
+        try:
+            reply = decoder.decode(data)
+        except msgspec.ValidationError:
+            return loads(data)
+        body: dict[str, Any] = {}
+        if reply.result is not None:
+            body["result"] = {
+                uid: {
+                    key: decode_raw(raw) for key, raw in values.items() if key in wanted
+                }
+                for uid, values in reply.result.items()
+            }
+        if reply.err is not None:
+            body["err"] = reply.err
+        return body
+
+    return _decode
+
+
 @dataclass(slots=True)
 class DeviceInfo:
     """Device information."""
@@ -49,3 +169,96 @@ class DeviceInfo:
         self.serial = ensure_string(self.serial) or "9999999999"
         self.sw_version = ensure_string(self.sw_version) or "0.0.0.E"
         self.type = ensure_string(self.type)
+
+
+class JsonFile:
+    """A dictionary stored in a json file.
+
+    Safe to use from multiple threads, and from multiple processes where fcntl
+    is available.
+    """
+
+    def __init__(self, path: str | Path):
+        """Init the file.
+
+        Args:
+            path (str, Path): The json file, created on the first write
+
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            _LOG.warning("Could not read %s: %s", self.path, exc)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, key: str) -> Any:
+        """Get the value of key, None if not stored."""
+        with self._lock:
+            return self._read().get(key)
+
+    def _write(self, data: dict[str, Any]) -> None:
+        # A unique file in the same directory, so the replace is atomic
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=self.path.parent,
+            prefix=self.path.name + ".",
+            suffix=".tmp",
+            delete=False,
+        ) as tmp:
+            tmp.write(json.dumps(data))
+        tmp_path = Path(tmp.name)
+        try:
+            tmp_path.replace(self.path)
+        except BaseException:
+            tmp_path.unlink()
+            raise
+
+    @contextlib.contextmanager
+    def _process_lock(self) -> Iterator[None]:
+        """Lock the file against other processes, where supported."""
+        if fcntl is None:
+            yield
+            return
+        with self.path.with_suffix(self.path.suffix + ".lock").open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store the value of key."""
+        with self._lock, self._process_lock():
+            data = self._read()
+            data[key] = value
+            self._write(data)
+
+    def update(self, key: str, func: Callable[[Any], Any]) -> Any:
+        """Replace the value of key by func(value), atomically across processes.
+
+        Args:
+            key (str): The key to update
+            func (Callable): Called with the stored value, None if not stored, and
+                returns the new value. The key is removed if it returns None.
+
+        Returns:
+            Any: The new value
+
+        """
+        with self._lock, self._process_lock():
+            data = self._read()
+            value = func(data.get(key))
+            if value is None:
+                data.pop(key, None)
+            else:
+                data[key] = value
+            self._write(data)
+            return value
@@ -0,0 +1,112 @@
+"""Persist the sensor layout discovered on a device.
+
+Discovering sensors with SMAWebConnect.get_sensors reads all values and
+parameters of a device, the heaviest requests a device serves. The layout only
+changes with the device firmware, so it can be stored per serial and software
+version and restored when reconnecting.
+"""
+
+from pathlib import Path
+from typing import Any, Protocol
+
+from .helpers import DeviceInfo, JsonFile
+from .sensor import Sensor, Sensors
+
+_LAYOUT_FIELDS = ("key", "name", "unit", "factor", "path", "enabled", "l10n_translate")
+# Optional, layouts stored before these settings were added do not have them
+_LAYOUT_SETTINGS = ("deadband", "deadband_rel", "publish_interval")
+
+
+class LayoutStore(Protocol):
+    """Storage for sensor layouts."""
+
+    def load(self, device_key: str) -> list[dict[str, Any]] | None:
+        """Load a layout, None if not stored."""
+
+    def save(self, device_key: str, layout: list[dict[str, Any]]) -> None:
+        """Store a layout."""
+
+
+def layout_key(device_info: DeviceInfo) -> str | None:
+    """Return the key to store a layout under.
+
+    Args:
+        device_info (DeviceInfo): Device information as returned by device_info()
+
+    Returns:
+        str: Serial and software version, None if the serial is not known
+
+    """
+    if device_info.serial == DeviceInfo().serial:
+        return None
+    return f"{device_info.serial}_{device_info.sw_version}"
+
+
+def dump_layout(sensors: Sensors) -> list[dict[str, Any]]:
+    """Serialise sensors to a json compatible layout.
+
+    Args:
+        sensors (Sensors): Sensors to serialise, values are not included
+
+    Returns:
+        list: A dictionary per sensor
+
+    """
+    layout = []
+    for sen in sensors:
+        item = {attr: getattr(sen, attr) for attr in _LAYOUT_FIELDS + _LAYOUT_SETTINGS}
+        if isinstance(sen.path, tuple):
+            item["path"] = list(sen.path)
+        item["key_idx"] = sen.key_idx
+        layout.append(item)
+    return layout
+
+
+def load_layout(layout: list[dict[str, Any]]) -> Sensors:
+    """Restore sensors from a layout created by dump_layout.
+
+    Args:
+        layout (list): A dictionary per sensor
+
+    Raises:
+        ValueError: The layout is not valid
+
+    Returns:
+        Sensors: Sensors object containing Sensor objects
+
+    """
+    sensors = []
+    try:
+        for item in layout:
+            sen = Sensor(
+                **{attr: item[attr] for attr in _LAYOUT_FIELDS},
+                **{attr: item.get(attr) for attr in _LAYOUT_SETTINGS},
+            )
+            if isinstance(sen.path, list):
+                sen.path = tuple(sen.path)
+            sen.key_idx = int(item["key_idx"])
+            sensors.append(sen)
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid sensor layout: {exc}") from exc
+    return Sensors(sensors)
+
+
+class JsonLayoutStore:
+    """Store layouts of all devices in a single json file."""
+
+    def __init__(self, path: str | Path):
+        """Init the store.
+
+        Args:
+            path (str, Path): The json file, created on the first save
+
+        """
+        self.file = JsonFile(path)
+
+    def load(self, device_key: str) -> list[dict[str, Any]] | None:
+        """Load a layout, None if not stored."""
+        return self.file.get(device_key)
+
+    def save(self, device_key: str, layout: list[dict[str, Any]]) -> None:
+        """Store a layout."""
+        self.file.set(device_key, layout)
@@ -0,0 +1,122 @@
+"""Adaptive limit of the concurrent requests sent to a device."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from .const import DEFAULT_LATENCY_TARGET, DEFAULT_MAX_CONCURRENT_REQUESTS
+
+_LOG = logging.getLogger(__name__)
+
+
+class AdaptiveLimiter:
+    """Limit the number of in-flight requests to a device.
+
+    WebConnect modules are small embedded web servers. The limit is adjusted
+    AIMD-style: every fast, successful request increases the limit by 1/limit
+    (about one per round of requests), every failed or slow request multiplies
+    it by backoff.
+    """
+
+    def __init__(
+        self,
+        max_limit: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        min_limit: int = 1,
+        initial_limit: int | None = None,
+        latency_target: float = DEFAULT_LATENCY_TARGET,
+        backoff: float = 0.5,
+    ):
+        """Init the limiter.
+
+        Args:
+            max_limit (int, optional): Upper bound of the limit.
+            min_limit (int, optional): Lower bound of the limit. Defaults to 1.
+            initial_limit (int, optional): Starting limit. Defaults to min_limit.
+            latency_target (float, optional): Requests slower than this many seconds
+                reduce the limit.
+            backoff (float, optional): Factor applied to the limit on a failed or slow
+                request. Defaults to 0.5.
+
+        """
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= max_limit")
+        if not 0 < backoff < 1:
+            raise ValueError("Expected 0 < backoff < 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self._limit = float(min(max(initial_limit or min_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests in flight."""
+        return self._in_flight
+
+    def _wake(self) -> None:
+        """Wake waiters for every free slot."""
+        free = self.limit - self._in_flight
+        while free > 0 and self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                free -= 1
+
+    def _update(self, latency: float, error: bool) -> None:
+        """Adjust the limit after a request."""
+        if error or latency > self.latency_target:
+            new_limit = max(self.min_limit, self._limit * self.backoff)
+            if int(new_limit) < self.limit:
+                _LOG.debug(
+                    "Reducing concurrent requests to %d (latency %.2fs, error: %s)",
+                    int(new_limit),
+                    latency,
+                    error,
+                )
+        else:
+            new_limit = min(self.max_limit, self._limit + 1 / self._limit)
+        self._limit = new_limit
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """Wait for a free slot and hold it while sending a request.
+
+        Exceptions raised while holding the slot count as failed requests.
+        """
+        while self._in_flight >= self.limit:
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                # Pass on a wake-up we received before being cancelled
+                if fut.done() and not fut.cancelled():
+                    self._wake()
+                raise
+        self._in_flight += 1
+
+        start = time.monotonic()
+        error: bool | None = False
+        try:
+            yield
+        except asyncio.CancelledError:
+            error = None  # Cancelled requests do not tell us anything
+            raise
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._in_flight -= 1
+            if error is not None:
+                self._update(time.monotonic() - start, error)
+            self._wake()
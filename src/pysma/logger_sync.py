@@ -0,0 +1,127 @@
+"""Incremental reading of device loggers."""
+
+import logging
+import time
+from pathlib import Path
+from typing import Protocol
+
+from .const import (
+    DEFAULT_CLOCK_TOLERANCE,
+    DEFAULT_LOGGER_LOOKBACK,
+    DEFAULT_LOGGER_WINDOW,
+)
+from .helpers import JsonFile
+from .sma_webconnect import SMAWebConnect
+
+_LOG = logging.getLogger(__name__)
+
+
+class HighWaterStore(Protocol):
+    """Storage for the last logger timestamp read per device and log."""
+
+    def get(self, serial: str, log_id: int) -> int | None:
+        """Get the last timestamp read, None if never read."""
+
+    def set(self, serial: str, log_id: int, timestamp: int) -> None:
+        """Store the last timestamp read."""
+
+
+class JsonHighWaterStore:
+    """Store high-water marks of all devices in a single json file."""
+
+    def __init__(self, path: str | Path):
+        """Init the store.
+
+        Args:
+            path (str, Path): The json file, created on the first save
+
+        """
+        self.file = JsonFile(path)
+
+    def get(self, serial: str, log_id: int) -> int | None:
+        """Get the last timestamp read, None if never read."""
+        timestamp = self.file.get(f"{serial}_{log_id}")
+        return timestamp if isinstance(timestamp, int) else None
+
+    def set(self, serial: str, log_id: int, timestamp: int) -> None:
+        """Store the last timestamp read."""
+        self.file.set(f"{serial}_{log_id}", timestamp)
+
+
+class LoggerSync:
+    """Read only the logger entries added since the previous sync.
+
+    The timestamp of the last entry read is stored per device serial and log id.
+    Gaps, e.g. when the device was offline, are read in windows with
+    SMAWebConnect.iter_logger. A stored timestamp that lies in the future (the
+    device clock jumped back) is discarded and the lookback period is read again.
+    """
+
+    def __init__(
+        self,
+        sma: SMAWebConnect,
+        store: HighWaterStore,
+        serial: str | None = None,
+        lookback: int = DEFAULT_LOGGER_LOOKBACK,
+        clock_tolerance: int = DEFAULT_CLOCK_TOLERANCE,
+        window: int = DEFAULT_LOGGER_WINDOW,
+    ):
+        """Init the logger sync.
+
+        Args:
+            sma (SMAWebConnect): Connection to the device
+            store (HighWaterStore): Store for the last timestamp read
+            serial (str, optional): Serial of the device, read with device_info()
+                if None.
+            lookback (int, optional): Seconds to read when there is no stored
+                timestamp. Defaults to one day.
+            clock_tolerance (int, optional): Seconds a stored timestamp may be in
+                the future. Defaults to one hour.
+            window (int, optional): Seconds per request, see iter_logger.
+
+        """
+        self.sma = sma
+        self.store = store
+        self.serial = serial
+        self.lookback = lookback
+        self.clock_tolerance = clock_tolerance
+        self.window = window
+
+    async def sync(self, log_id: int, now: int | None = None) -> list[dict]:
+        """Read the entries added to a log since the previous sync.
+
+        Args:
+            log_id (int): The ID of the log to read, see read_logger.
+            now (int, optional): Current timestamp in seconds. Defaults to time.time().
+
+        Returns:
+            list: New log entries in timestamp order
+
+        """
+        if self.serial is None:
+            self.serial = (await self.sma.device_info()).serial
+        if now is None:
+            now = int(time.time())
+
+        last = self.store.get(self.serial, log_id)
+        if last is not None and last > now + self.clock_tolerance:
+            _LOG.warning(
+                "%s: Last entry of log %s is in the future (%s), reading the last %ss",
+                self.sma.url,
+                log_id,
+                last,
+                self.lookback,
+            )
+            last = None
+        start = now - self.lookback if last is None else last
+
+        entries = [
+            entry
+            async for entry in self.sma.iter_logger(
+                log_id, start, now, window=self.window
+            )
+            if last is None or entry.get("t", 0) > last
+        ]
+        if entries and isinstance(entries[-1].get("t"), int):
+            self.store.set(self.serial, log_id, entries[-1]["t"])
+        return entries
@@ -0,0 +1,203 @@
+"""Request metrics of SMAWebConnect.
+
+SMAWebConnect reports every request to its metrics, any object implementing
+Instrumentation. Metrics keeps counters and a latency histogram per endpoint,
+and exports them as a dictionary or in the Prometheus text format.
+"""
+
+import bisect
+from collections import Counter
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from .const import DEFAULT_LATENCY_BUCKETS
+
+
+class Instrumentation(Protocol):
+    """Receives the requests sent by SMAWebConnect."""
+
+    def on_request(
+        self, endpoint: str, seconds: float, size: int, decode_seconds: float
+    ) -> None:
+        """Record a reply, seconds includes retries."""
+
+    def on_retry(self, endpoint: str) -> None:
+        """Record a retry after a failed attempt."""
+
+    def on_error(self, endpoint: str, code: str) -> None:
+        """Record an error.
+
+        The code is the error code returned by the device, or one of "timeout",
+        "connection" and "invalid_json".
+        """
+
+    def on_login(self) -> None:
+        """Record a login attempt."""
+
+
+@dataclass(slots=True)
+class EndpointMetrics:
+    """Metrics of the requests to an endpoint."""
+
+    buckets: tuple[float, ...]
+    requests: int = 0
+    retries: int = 0
+    bytes: int = 0
+    seconds: float = 0
+    """Total latency."""
+    decode_seconds: float = 0
+    """Total time spent decoding replies."""
+    counts: list[int] = field(default_factory=list)
+    """Number of requests per latency bucket, the last for those slower than all."""
+    errors: Counter[str] = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        """Init the bucket counts."""
+        self.counts = [0] * (len(self.buckets) + 1)
+
+
+class Metrics:
+    """Counters and latency histograms per endpoint.
+
+    A single Metrics can be shared by several SMAWebConnect instances to
+    aggregate their requests.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        """Init the metrics.
+
+        Args:
+            buckets (tuple, optional): Upper bounds of the latency histogram, in seconds
+
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.endpoints: dict[str, EndpointMetrics] = {}
+        self.logins = 0
+
+    def _endpoint(self, endpoint: str) -> EndpointMetrics:
+        try:
+            return self.endpoints[endpoint]
+        except KeyError:
+            res = self.endpoints[endpoint] = EndpointMetrics(self.buckets)
+            return res
+
+    def on_request(
+        self, endpoint: str, seconds: float, size: int, decode_seconds: float
+    ) -> None:
+        """Record a reply, seconds includes retries."""
+        stats = self._endpoint(endpoint)
+        stats.requests += 1
+        stats.bytes += size
+        stats.seconds += seconds
+        stats.decode_seconds += decode_seconds
+        stats.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def on_retry(self, endpoint: str) -> None:
+        """Record a retry after a failed attempt."""
+        self._endpoint(endpoint).retries += 1
+
+    def on_error(self, endpoint: str, code: str) -> None:
+        """Record an error, the error code of the device or the kind of failure."""
+        self._endpoint(endpoint).errors[code] += 1
+
+    def on_login(self) -> None:
+        """Record a login attempt."""
+        self.logins += 1
+
+    def reset(self) -> None:
+        """Reset all metrics."""
+        self.endpoints.clear()
+        self.logins = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the metrics as a json compatible dictionary.
+
+        Returns:
+            dict: The logins, and the metrics of each endpoint. The latency
+                buckets are cumulative and keyed by upper bound, as in Prometheus.
+
+        """
+        endpoints = {}
+        for endpoint, stats in self.endpoints.items():
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip((*self.buckets, "+Inf"), stats.counts, strict=True):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            endpoints[endpoint] = {
+                "requests": stats.requests,
+                "retries": stats.retries,
+                "bytes": stats.bytes,
+                "seconds": stats.seconds,
+                "decode_seconds": stats.decode_seconds,
+                "buckets": buckets,
+                "errors": dict(stats.errors),
+            }
+        return {"logins": self.logins, "endpoints": endpoints}
+
+    def prometheus(
+        self, labels: Mapping[str, str] | None = None, prefix: str = "pysma"
+    ) -> str:
+        """Return the metrics in the Prometheus text exposition format.
+
+        Args:
+            labels (Mapping, optional): Labels added to every sample, e.g. the device
+            prefix (str, optional): Prefix of the metric names. Defaults to "pysma".
+
+        Returns:
+            str: The metrics
+
+        """
+        const = [f'{key}="{_escape(val)}"' for key, val in (labels or {}).items()]
+
+        def _labels(**extra: str) -> str:
+            items = const + [f'{key}="{_escape(val)}"' for key, val in extra.items()]
+            return "{" + ",".join(items) + "}" if items else ""
+
+        snap = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_logins_total Logins to the device.",
+            f"# TYPE {prefix}_logins_total counter",
+            f"{prefix}_logins_total{_labels()} {snap['logins']}",
+        ]
+        counters = (
+            ("requests", "Replies received."),
+            ("retries", "Attempts retried after a failure."),
+            ("bytes", "Bytes received."),
+            ("decode_seconds", "Seconds spent decoding replies."),
+        )
+        for name, help_text in counters:
+            lines.append(f"# HELP {prefix}_{name}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.extend(
+                f"{prefix}_{name}_total{_labels(endpoint=endpoint)} {stats[name]}"
+                for endpoint, stats in snap["endpoints"].items()
+            )
+
+        lines.append(f"# HELP {prefix}_errors_total Errors by code.")
+        lines.append(f"# TYPE {prefix}_errors_total counter")
+        for endpoint, stats in snap["endpoints"].items():
+            lines.extend(
+                f"{prefix}_errors_total{_labels(endpoint=endpoint, code=code)} {count}"
+                for code, count in stats["errors"].items()
+            )
+
+        name = f"{prefix}_request_seconds"
+        lines.append(f"# HELP {name} Latency of requests, including retries.")
+        lines.append(f"# TYPE {name} histogram")
+        for endpoint, stats in snap["endpoints"].items():
+            lines.extend(
+                f"{name}_bucket{_labels(endpoint=endpoint, le=bound)} {count}"
+                for bound, count in stats["buckets"].items()
+            )
+            lines.append(f"{name}_sum{_labels(endpoint=endpoint)} {stats['seconds']}")
+            lines.append(
+                f"{name}_count{_labels(endpoint=endpoint)} {stats['requests']}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
@@ -0,0 +1,129 @@
+"""Record sensor values in preallocated columns."""
+
+import math
+import time
+from array import array
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+from .const import DEFAULT_RECORDER_CAPACITY
+
+if TYPE_CHECKING:
+    from .sensor import Sensor, Sensors
+
+_NAN = float("nan")
+
+
+class SensorRecorder:
+    """Keep the last capacity values of every sensor in a Sensors set.
+
+    Values are stored as floats in one array("d") column per sensor, used as a
+    ring buffer together with a column of timestamps. Values that are not
+    numbers are stored as NaN. Columns are returned as array("d"), which
+    numpy.frombuffer can wrap without a further copy.
+
+    The recorder is attached to the Sensors set and SMAWebConnect.read records
+    every read. Sensors added to the set later are not recorded.
+    """
+
+    def __init__(self, sensors: "Sensors", capacity: int = DEFAULT_RECORDER_CAPACITY):
+        """Init the recorder and attach it to sensors.
+
+        Args:
+            sensors (Sensors): The sensors to record
+            capacity (int, optional): Number of reads to keep.
+
+        """
+        if capacity < 1:
+            raise ValueError("capacity should be at least 1")
+        self.capacity = capacity
+        self._sensors: list[Sensor] = list(sensors)
+        self._index = {sen.name: idx for idx, sen in enumerate(self._sensors)}
+        self._times = array("d", [_NAN]) * capacity
+        self._columns = [array("d", [_NAN]) * capacity for _ in self._sensors]
+        self._pos = 0
+        self._count = 0
+        sensors.recorder = self
+
+    def __len__(self) -> int:
+        """Return the number of reads recorded."""
+        return self._count
+
+    @property
+    def names(self) -> list[str]:
+        """Names of the recorded sensors."""
+        return list(self._index)
+
+    def record(self, timestamp: float | None = None) -> None:
+        """Record the current value of all sensors.
+
+        Args:
+            timestamp (float, optional): Time of the read. Defaults to time.time().
+
+        """
+        pos = self._pos
+        self._times[pos] = time.time() if timestamp is None else timestamp
+        for column, sen in zip(self._columns, self._sensors, strict=True):
+            val = sen.value
+            column[pos] = val if isinstance(val, (int, float)) else _NAN
+        self._pos = (pos + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def _ordered(self, column: array) -> array:
+        """Return a column in chronological order."""
+        if self._count < self.capacity:
+            return column[: self._count]
+        return column[self._pos :] + column[: self._pos]
+
+    def timestamps(self) -> array:
+        """Timestamps of the recorded reads, oldest first."""
+        return self._ordered(self._times)
+
+    def column(self, name: str) -> array:
+        """Return the recorded values of a sensor, oldest first.
+
+        Raises:
+            KeyError: The sensor is not recorded
+
+        """
+        return self._ordered(self._columns[self._index[name]])
+
+    def _valid(self, name: str) -> Iterator[float]:
+        return (val for val in self.column(name) if not math.isnan(val))
+
+    def mean(self, name: str) -> float | None:
+        """Average of the recorded values, None if there are none."""
+        total = count = 0.0
+        for val in self._valid(name):
+            total += val
+            count += 1
+        return total / count if count else None
+
+    def min(self, name: str) -> float | None:
+        """Smallest recorded value, None if there are none."""
+        return min(self._valid(name), default=None)
+
+    def max(self, name: str) -> float | None:
+        """Largest recorded value, None if there are none."""
+        return max(self._valid(name), default=None)
+
+    def integrate(self, name: str) -> float:
+        """Integrate the recorded values over time (trapezoidal rule).
+
+        Intervals with a missing value at either end are skipped. The result is in
+        the sensor unit times seconds, e.g. Ws for a W sensor: divide by 3600 for Wh.
+        """
+        total = 0.0
+        times = self.timestamps()
+        values = self.column(name)
+        for idx in range(1, len(values)):
+            val0, val1 = values[idx - 1], values[idx]
+            if math.isnan(val0) or math.isnan(val1):
+                continue
+            total += (val0 + val1) / 2 * (times[idx] - times[idx - 1])
+        return total
+
+    def clear(self) -> None:
+        """Remove all recorded reads."""
+        self._pos = 0
+        self._count = 0
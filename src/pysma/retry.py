@@ -0,0 +1,137 @@
+"""Retry policy for requests to a device."""
+
+import asyncio
+import random
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from aiohttp import client_exceptions
+
+from .const import (
+    DEFAULT_REQUEST_RETRIES,
+    DEFAULT_RETRY_DELAY,
+    DEFAULT_RETRY_MAX_DELAY,
+    DEFAULT_TIMEOUT,
+)
+
+_BUDGET_END: ContextVar[float | None] = ContextVar("pysma_budget_end", default=None)
+
+
+@contextmanager
+def request_budget(seconds: float) -> Iterator[None]:
+    """Limit the time spent on retries by all requests in this context.
+
+    Requests started once the budget is spent are still attempted once, but not
+    retried. Nested budgets can only shorten the budget. The budget applies to the
+    current task, e.g. one poll cycle.
+
+    Args:
+        seconds (float): Time available from now
+
+    """
+    end = time.monotonic() + seconds
+    outer = _BUDGET_END.get()
+    token = _BUDGET_END.set(end if outer is None else min(outer, end))
+    try:
+        yield
+    finally:
+        _BUDGET_END.reset(token)
+
+
+def remaining_budget() -> float | None:
+    """Seconds left in the current request budget, None if there is no budget."""
+    end = _BUDGET_END.get()
+    return None if end is None else end - time.monotonic()
+
+
+@dataclass(slots=True)
+class RetryPolicy:
+    """When and how fast to retry a failed request.
+
+    The delay before retry n is delay * multiplier ** (n - 1), capped at
+    max_delay and randomly reduced by up to jitter (a fraction of the delay).
+    """
+
+    attempts: int = DEFAULT_REQUEST_RETRIES
+    """Maximum number of attempts, including the first."""
+    timeout: float = DEFAULT_TIMEOUT
+    """Seconds per attempt."""
+    delay: float = DEFAULT_RETRY_DELAY
+    """Seconds before the first retry."""
+    multiplier: float = 2
+    """Growth factor of the delay between retries."""
+    max_delay: float = DEFAULT_RETRY_MAX_DELAY
+    """Upper bound of the delay between retries."""
+    jitter: float = 0.5
+    """Fraction of the delay that is randomised."""
+    deadline: float | None = None
+    """Seconds available for all attempts of a request, None for no limit."""
+    retry_on: tuple[type[BaseException], ...] = (
+        client_exceptions.ClientError,
+        asyncio.TimeoutError,
+    )
+    """Exceptions that are retried, raised as SmaConnectionException once the
+    attempts are spent. Connection errors and timeouts not listed are raised
+    without retrying."""
+
+    def __post_init__(self) -> None:
+        """Validate the policy."""
+        if self.attempts < 1:
+            raise ValueError("At least one attempt is required")
+        if not 0 <= self.jitter <= 1:
+            raise ValueError("Expected 0 <= jitter <= 1")
+
+    def start(self) -> float | None:
+        """Return the monotonic time all attempts of a request should end by."""
+        ends = [
+            end
+            for end in (
+                None if self.deadline is None else time.monotonic() + self.deadline,
+                _BUDGET_END.get(),
+            )
+            if end is not None
+        ]
+        return min(ends) if ends else None
+
+    def attempt_timeout(self, attempt: int, end: float | None) -> float:
+        """Seconds allowed for an attempt.
+
+        Args:
+            attempt (int): Number of the attempt, 0 for the first
+            end (float, optional): Returned by start()
+
+        """
+        if attempt == 0:
+            # The first attempt is always made, even if the budget is spent
+            if self.deadline is None:
+                return self.timeout
+            return min(self.timeout, self.deadline)
+        if end is None:
+            return self.timeout
+        # aiohttp treats a timeout of 0 as no timeout
+        return max(0.001, min(self.timeout, end - time.monotonic()))
+
+    def retry_delay(
+        self, attempt: int, exc: BaseException, end: float | None
+    ) -> float | None:
+        """Seconds to wait before retrying a failed attempt.
+
+        Args:
+            attempt (int): Number of the failed attempt, 0 for the first
+            exc (BaseException): The exception raised by the attempt
+            end (float, optional): Returned by start()
+
+        Returns:
+            float: Delay before the next attempt, None if it should not be retried
+
+        """
+        if attempt + 1 >= self.attempts or not isinstance(exc, self.retry_on):
+            return None
+        delay = min(self.max_delay, self.delay * self.multiplier**attempt)
+        delay *= 1 - self.jitter * random.random()
+        if end is not None and time.monotonic() + delay >= end:
+            return None
+        return delay
@@ -2,15 +2,124 @@
 
 import copy
 import logging
-from collections.abc import Iterator
+import re
+import time
+from collections.abc import Callable, Iterator, Mapping
 from dataclasses import dataclass, field
+from functools import cache
+from typing import TYPE_CHECKING, Any
 
 import jmespath
 
-from pysma.const import JMESPATH_VAL, JMESPATH_VAL_IDX, JMESPATH_VAL_STR
+from pysma.const import (
+    JMESPATH_VAL,
+    JMESPATH_VAL_IDX,
+    JMESPATH_VAL_IDX_TAG,
+    JMESPATH_VAL_STR,
+    JMESPATH_VAL_TAG,
+)
+
+if TYPE_CHECKING:
+    from pysma.recorder import SensorRecorder
 
 _LOG = logging.getLogger(__name__)
 
+ExtractionPlan = Callable[[Any], Any]
+
+_MISSING = object()
+
+
+def _path_regex(path: str) -> re.Pattern[str]:
+    """Turn a JMESPATH_* template into a regex capturing the index."""
+    return re.compile(re.escape(path).replace(r"\{\}", r"(-?\d+)"))
+
+
+_RE_VAL_STR = _path_regex(JMESPATH_VAL_STR)
+_RE_VAL_IDX = _path_regex(JMESPATH_VAL_IDX)
+_RE_VAL_IDX_TAG = _path_regex(JMESPATH_VAL_IDX_TAG)
+
+
+def _first_tag(val: Any) -> Any:
+    """Equivalent of the jmespath expression `[0].tag`."""
+    if isinstance(val, list) and val:
+        first = val[0]
+        if isinstance(first, dict):
+            return first.get("tag")
+    return None
+
+
+def _extract_val(res: Any) -> Any:
+    """Equivalent of JMESPATH_VAL."""
+    return res.get("val") if isinstance(res, dict) else None
+
+
+def _extract_val_tag(res: Any) -> Any:
+    """Equivalent of JMESPATH_VAL_TAG."""
+    return _first_tag(_extract_val(res))
+
+
+def _plan_val_str(idx: int) -> ExtractionPlan:
+    """Equivalent of JMESPATH_VAL_STR for a specific index."""
+    str_id = idx + 1
+
+    def _extract(res: Any) -> Any:
+        if not isinstance(res, list):
+            return None
+        for item in res:
+            if isinstance(item, dict) and item.get("str") == str_id:
+                val = item.get("val")
+                if val is not None:
+                    return val
+        return None
+
+    return _extract
+
+
+def _plan_val_idx(idx: int, tag: bool = False) -> ExtractionPlan:
+    """Equivalent of JMESPATH_VAL_IDX (or JMESPATH_VAL_IDX_TAG) for a specific index."""
+
+    def _extract(res: Any) -> Any:
+        if not isinstance(res, dict):
+            return None
+        for values in res.values():
+            if values is None:
+                continue
+            if not isinstance(values, list) or not -len(values) <= idx < len(values):
+                return None
+            val = _extract_val(values[idx])
+            return _first_tag(val) if tag else val
+        return None
+
+    return _extract
+
+
+@cache
+def compile_path(path: str) -> ExtractionPlan:
+    """Compile a jmespath expression into an extraction plan.
+
+    The value shapes returned by WebConnect devices (see the JMESPATH_* constants)
+    are served by hand-specialised accessors, anything else by a compiled jmespath
+    expression. Plans are cached, so every sensor sharing a path shares the plan.
+
+    Args:
+        path (str): jmespath expression
+
+    Returns:
+        ExtractionPlan: Callable returning the value selected by path, or None
+
+    """
+    if path == JMESPATH_VAL:
+        return _extract_val
+    if path == JMESPATH_VAL_TAG:
+        return _extract_val_tag
+    if match := _RE_VAL_STR.fullmatch(path):
+        return _plan_val_str(int(match[1]))
+    if match := _RE_VAL_IDX.fullmatch(path):
+        return _plan_val_idx(int(match[1]))
+    if match := _RE_VAL_IDX_TAG.fullmatch(path):
+        return _plan_val_idx(int(match[1]), tag=True)
+    return jmespath.compile(path).search
+
 
 @dataclass(slots=True)
 class Sensor:
@@ -23,8 +132,22 @@ class Sensor:
     path: list | tuple | str | None = None
     enabled: bool = True
     l10n_translate: bool = False
+    deadband: float | None = None
+    """Minimum change of a numeric value to report."""
+    deadband_rel: float | None = None
+    """Minimum change of a numeric value to report, as a fraction of the value."""
+    publish_interval: float | None = None
+    """Seconds after which changes within the deadband are reported."""
     value: str | int | float | None = field(init=False)
     key_idx: int = field(repr=False, init=False)
+    _plan: ExtractionPlan | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _plan_path: str | None = field(default=None, init=False, repr=False, compare=False)
+    _reported: str | int | float | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _reported_at: float = field(default=0.0, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         """Post init Sensor."""
@@ -36,25 +159,48 @@ class Sensor:
             self.key = f"{skey[0]}_{skey[1]}"
             self.key_idx = int(skey[2])
 
-    def extract_value(self, result_body: dict, l10n: dict | None = None) -> bool:
+    def extract_value(
+        self, result_body: dict, l10n: Mapping[str, str] | None = None
+    ) -> bool:
         """Extract value from json body.
 
         Args:
             result_body (dict): json body retrieved from device
-            l10n (dict, optional): Dictionary to translate tags to strings. Defaults to None.
+            l10n (Mapping, optional): Mapping to translate tags to strings. Defaults to None.
 
         Returns:
-            bool: Extracting value successful
+            bool: The value changed, subject to deadband and publish_interval
+
+        """
+        self.decode_value(result_body, l10n)
+        return self.pop_change() is not None
+
+    def decode_value(
+        self, result_body: dict, l10n: Mapping[str, str] | None = None
+    ) -> None:
+        """Decode value from json body, without reporting the change.
+
+        Args:
+            result_body (dict): json body retrieved from device
+            l10n (Mapping, optional): Mapping to translate tags to strings. Defaults to None.
 
         """
         try:
             res = result_body[self.key]
         except (KeyError, TypeError):
             _LOG.warning("Sensor %s: Not found in %s", self.key, result_body)
-            res = self.value
             self.value = None
-            return self.value != res
+            return
+        self.decode_result(res, l10n)
+
+    def decode_result(self, res: Any, l10n: Mapping[str, str] | None = None) -> None:
+        """Decode value from the result of this sensor's key.
+
+        Args:
+            res (Any): The value of the key in the json body retrieved from device
+            l10n (Mapping, optional): Mapping to translate tags to strings. Defaults to None.
 
+        """
         if not isinstance(self.path, str):
             # Try different methods until we can decode...
             _paths = (
@@ -69,7 +215,7 @@ class Sensor:
 
             while _paths:
                 _path = _paths.pop()
-                _val = jmespath.search(_path, res)
+                _val = compile_path(_path)(res)
                 if _val is not None:
                     _LOG.debug(
                         "Sensor %s: Will be decoded with %s from %s",
@@ -82,7 +228,10 @@ class Sensor:
 
         # Extract new value
         if isinstance(self.path, str):
-            res = jmespath.search(self.path, res)
+            if self._plan is None or self._plan_path != self.path:
+                self._plan = compile_path(self.path)
+                self._plan_path = self.path
+            res = self._plan(res)
         else:
             _LOG.debug("Sensor %s: No successful value decoded yet: %s", self.name, res)
             res = None
@@ -95,20 +244,68 @@ class Sensor:
         if isinstance(res, (int, float)) and self.factor:
             res /= self.factor
 
-        if self.l10n_translate and isinstance(l10n, dict):
+        if self.l10n_translate and l10n is not None:
             res = l10n.get(
                 str(res),
                 res,
             )
 
-        try:
-            return res != self.value
-        finally:
-            self.value = res
+        self.value = res
+
+    def pop_change(
+        self, deadband: float | None = None, now: float | None = None
+    ) -> "SensorChange | None":
+        """Get the change since the value was last reported, and report it.
+
+        A numeric value that moved less than the deadband since it was last reported
+        is only reported once publish_interval seconds have passed.
+
+        Args:
+            deadband (float, optional): Used if the sensor has no deadband.
+            now (float, optional): Current time.monotonic().
+
+        Returns:
+            SensorChange: The reported and the new value, None if not changed
+
+        """
+        old, new = self._reported, self.value
+        if new == old:
+            return None
+        if isinstance(new, (int, float)) and isinstance(old, (int, float)):
+            threshold = self.deadband if self.deadband is not None else deadband
+            if self.deadband_rel:
+                threshold = max(threshold or 0, abs(old) * self.deadband_rel)
+            if threshold and abs(new - old) < threshold:
+                if self.publish_interval is None:
+                    return None
+                if now is None:
+                    now = time.monotonic()
+                if now - self._reported_at < self.publish_interval:
+                    return None
+        self._reported = new
+        if self.publish_interval is not None:
+            self._reported_at = time.monotonic() if now is None else now
+        return SensorChange(self, old, new)
+
+
+@dataclass(slots=True)
+class SensorChange:
+    """A changed sensor value."""
+
+    sensor: Sensor
+    old: str | int | float | None
+    """Value last reported."""
+    new: str | int | float | None
+    """Current value."""
 
 
 class Sensors:
-    """SMA Sensors."""
+    """SMA Sensors.
+
+    Sensors are indexed by name, by key and by key and key_idx, so lookups do
+    not depend on the number of sensors. The name, key and key_idx of a Sensor
+    should not be changed once it has been added.
+    """
 
     def __init__(self, sensors: Sensor | list[Sensor] | None = None):
         """Init Sensors.
@@ -118,7 +315,11 @@ class Sensors:
                 to add on init. Defaults to None.
 
         """
-        self.__s: list[Sensor] = []
+        self.__s: dict[str, Sensor] = {}
+        self.__k: dict[str, list[Sensor]] = {}
+        self.__ki: dict[tuple[str, int], Sensor] = {}
+        self.recorder: SensorRecorder | None = None
+        """Records every read, see pysma.recorder."""
 
         if sensors:
             self.add(sensors)
@@ -136,21 +337,16 @@ class Sensors:
         """Check if a sensor is defined.
 
         Args:
-            key (str, Sensor): [description]
+            key (str, Sensor): Either the name or key of the Sensor, or a Sensor
+                which will be matched on name
 
         Returns:
-            bool: [description]
+            bool: True if the sensor is defined
 
         """
         if isinstance(key, Sensor):
             key = key.name
-
-        try:
-            if self[key]:
-                return True
-        except KeyError:
-            pass
-        return False
+        return key in self.__s or key in self.__k
 
     def __getitem__(self, key: str) -> Sensor:
         """Get a sensor.
@@ -165,10 +361,14 @@ class Sensors:
             Sensor: The matching Sensor object
 
         """
-        for sen in self.__s:
-            if key in (sen.name, sen.key):
-                return sen
-        raise KeyError(key)
+        try:
+            return self.__s[key]
+        except KeyError:
+            pass
+        try:
+            return self.__k[key][0]
+        except KeyError:
+            raise KeyError(key) from None
 
     def __iter__(self) -> Iterator[Sensor]:
         """Iterate Sensor objects.
@@ -177,7 +377,60 @@ class Sensors:
             Iterator[Sensor]: Sensor iterator
 
         """
-        return self.__s.__iter__()
+        return iter(self.__s.values())
+
+    def get_by_key(self, key: str, key_idx: int = 0) -> Sensor | None:
+        """Get the first sensor matching key and key_idx.
+
+        Args:
+            key (str): The key of the Sensor
+            key_idx (int, optional): The index of the value. Defaults to 0.
+
+        Returns:
+            Sensor: The matching Sensor object, None if not found
+
+        """
+        return self.__ki.get((key, key_idx))
+
+    def by_key(self, key: str) -> list[Sensor]:
+        """Get all sensors with a key.
+
+        Args:
+            key (str): The key of the Sensor
+
+        Returns:
+            list: The matching Sensor objects, in the order they were added
+
+        """
+        return list(self.__k.get(key, ()))
+
+    def decode_values(
+        self, result_body: dict, l10n: Mapping[str, str] | None = None
+    ) -> list[Sensor]:
+        """Decode the values of all enabled sensors from json body.
+
+        Sensors are grouped by key, so the result of each key is looked up once
+        for all sensors sharing it, e.g. the phases of a measurement.
+
+        Args:
+            result_body (dict): json body retrieved from device
+            l10n (Mapping, optional): Mapping to translate tags to strings. Defaults to None.
+
+        Returns:
+            list: Enabled sensors whose key is not in result_body, left unchanged
+
+        """
+        notfound = []
+        for key, group in self.__k.items():
+            res = result_body.get(key, _MISSING)
+            for sen in group:
+                if not sen.enabled:
+                    continue
+                if res is _MISSING:
+                    notfound.append(sen)
+                else:
+                    sen.decode_result(res, l10n)
+        return notfound
 
     def add(self, sensor: Sensor | list[Sensor]) -> None:
         """Add a sensor, logs warning if it exists.
@@ -203,14 +456,45 @@ class Sensors:
         else:
             raise TypeError("pysma.Sensor expected")
 
-        if sensor.name in self:
-            old = self[sensor.name]
-            self.__s.remove(old)
+        if sensor.name in self.__s:
+            old = self.remove(sensor.name)
             _LOG.warning("Replacing sensor %s with %s", old, sensor)
 
-        if sensor.key in self and self[sensor.key].key_idx == sensor.key_idx:
+        if self.__ki.setdefault((sensor.key, sensor.key_idx), sensor) is not sensor:
             _LOG.warning(
                 "Duplicate SMA sensor key %s (idx: %s)", sensor.key, sensor.key_idx
             )
 
-        self.__s.append(sensor)
+        self.__s[sensor.name] = sensor
+        self.__k.setdefault(sensor.key, []).append(sensor)
+
+    def remove(self, name: str | Sensor) -> Sensor:
+        """Remove a sensor.
+
+        Args:
+            name (str, Sensor): The name of the Sensor, or a Sensor with that name
+
+        Raises:
+            KeyError: Item was not found
+
+        Returns:
+            Sensor: The removed Sensor object
+
+        """
+        if isinstance(name, Sensor):
+            name = name.name
+        sensor = self.__s.pop(name)
+        same_key = [sen for sen in self.__k[sensor.key] if sen is not sensor]
+        if same_key:
+            self.__k[sensor.key] = same_key
+        else:
+            del self.__k[sensor.key]
+        key_idx = (sensor.key, sensor.key_idx)
+        if self.__ki.get(key_idx) is sensor:
+            # A duplicate added later takes the place of the removed sensor
+            del self.__ki[key_idx]
+            for sen in same_key:
+                if sen.key_idx == sensor.key_idx:
+                    self.__ki[key_idx] = sen
+                    break
+        return sensor
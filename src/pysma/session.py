@@ -0,0 +1,189 @@
+"""Share a logged in session between clients of the same device.
+
+A device only accepts a few sessions, further logins are refused with
+"Max amount of sessions reached" (err 503) until a session expires. Clients
+that share a SessionStore, also in different processes, use a single session
+per device and user group: the first client logs in and stores the sid, the
+others use the stored sid, and the last client to close logs out.
+
+Clients hold a lease on the session, renewed while they read, and report
+when they last used it, so an idle client does not replace a session the
+others keep alive. A replaced session is logged out by the last client to
+switch from it. Clients that stop without closing, e.g. a crashed process,
+are dropped once their lease expired.
+"""
+
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Protocol
+
+from .const import DEFAULT_SESSION_LEASE
+from .helpers import JsonFile
+
+
+@dataclass(frozen=True, slots=True)
+class SharedSession:
+    """A session in a session store."""
+
+    sid: str
+    created: float
+    """Time of the login, as returned by time.time()."""
+    used: float = 0.0
+    """Last time a holder used the session, as returned by time.time()."""
+
+
+class SessionStore(Protocol):
+    """Storage for the sessions shared by clients.
+
+    A session is stored per key, the device url and user group, with the
+    clients (holders) that use it and the sid each of them uses.
+    """
+
+    lease: float
+    """Seconds a holder stays registered without acquiring the session again."""
+
+    def acquire(
+        self,
+        key: str,
+        holder: str,
+        stale: str | None = None,
+        used: float | None = None,
+    ) -> SharedSession | None:
+        """Register a holder, or renew its lease, and return the stored session.
+
+        The holder is registered as using the returned session. used, the last
+        time the holder used the stored session, is kept with the session. A
+        stored sid equal to stale, a sid the holder found expired, is removed.
+        None is returned if there is no session, the holder should login and
+        publish the new session.
+        """
+
+    def publish(self, key: str, holder: str, session: SharedSession) -> None:
+        """Store a new session, used by the holder."""
+
+    def release(self, key: str, holder: str, sid: str) -> bool:
+        """Unregister a holder that used sid, or that replaced sid by a newer session.
+
+        Returns True if sid is not used by other holders and should be
+        logged out, it is removed from the store.
+        """
+
+
+class JsonSessionStore:
+    """Store the sessions of all devices in a single json file.
+
+    Updates are locked across processes where fcntl is available, so the
+    file can be shared by all clients on a host.
+    """
+
+    def __init__(self, path: str | Path, lease: float = DEFAULT_SESSION_LEASE):
+        """Init the store.
+
+        Args:
+            path (str, Path): The json file, created on the first update
+            lease (float, optional): Seconds a holder stays registered without
+                acquiring the session again. Defaults to the session timeout of
+                the device.
+
+        """
+        self.file = JsonFile(path)
+        self.lease = lease
+
+    def _holders(self, value: Any, now: float) -> dict[str, dict[str, Any]]:
+        """Get the holders of a stored value, with their sid and time seen.
+
+        Holders with an expired lease are dropped.
+        """
+        holders = value.get("holders") if isinstance(value, dict) else None
+        if not isinstance(holders, dict):
+            return {}
+        return {
+            holder: held
+            for holder, held in holders.items()
+            if isinstance(held, dict)
+            and isinstance(held.get("seen"), (int, float))
+            and now - held["seen"] <= self.lease
+        }
+
+    def acquire(
+        self,
+        key: str,
+        holder: str,
+        stale: str | None = None,
+        used: float | None = None,
+    ) -> SharedSession | None:
+        """Register a holder, or renew its lease, and return the stored session."""
+        now = time.time()
+
+        def _acquire(value: Any) -> dict[str, Any]:
+            holders = self._holders(value, now)
+            session = _session(value)
+            if session is not None and session.sid == stale:
+                session = None
+            if session is None:
+                holders[holder] = {"sid": None, "seen": now}
+                return {"holders": holders}
+            if used is not None and holders.get(holder, {}).get("sid") == session.sid:
+                session = replace(session, used=max(session.used, used))
+            holders[holder] = {"sid": session.sid, "seen": now}
+            return _value(session, holders)
+
+        return _session(self.file.update(key, _acquire))
+
+    def publish(self, key: str, holder: str, session: SharedSession) -> None:
+        """Store a new session, used by the holder."""
+        now = time.time()
+
+        def _publish(value: Any) -> dict[str, Any]:
+            holders = self._holders(value, now)
+            holders[holder] = {"sid": session.sid, "seen": now}
+            return _value(
+                replace(session, used=max(session.used, session.created)), holders
+            )
+
+        self.file.update(key, _publish)
+
+    def release(self, key: str, holder: str, sid: str) -> bool:
+        """Unregister a holder, True if sid is no longer used and should be logged out."""
+        now = time.time()
+        unused = True
+
+        def _release(value: Any) -> dict[str, Any] | None:
+            nonlocal unused
+            holders = self._holders(value, now)
+            if holders.get(holder, {}).get("sid") == sid:
+                holders.pop(holder)
+            unused = all(held.get("sid") != sid for held in holders.values())
+            session = _session(value)
+            if session is not None and session.sid == sid and unused:
+                session = None
+            if session is not None:
+                return _value(session, holders)
+            return {"holders": holders} if holders else None
+
+        self.file.update(key, _release)
+        return unused
+
+
+def _value(
+    session: SharedSession, holders: dict[str, dict[str, Any]]
+) -> dict[str, Any]:
+    """Get the value to store for a session and its holders."""
+    return {
+        "sid": session.sid,
+        "created": session.created,
+        "used": session.used,
+        "holders": holders,
+    }
+
+
+def _session(value: Any) -> SharedSession | None:
+    """Get the session of a stored value, None if there is none."""
+    if not isinstance(value, dict) or not isinstance(value.get("sid"), str):
+        return None
+    created, used = value.get("created"), value.get("used")
+    created = created if isinstance(created, (int, float)) else 0.0
+    return SharedSession(
+        value["sid"], created, used if isinstance(used, (int, float)) else created
+    )
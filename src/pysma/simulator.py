@@ -0,0 +1,299 @@
+"""Simulate WebConnect devices, to test pollers and retry policies locally.
+
+Every simulated device listens on its own port and serves the /dyn/*.json
+endpoints from the payloads it was created with, for example the replies of a
+real device to getAllOnlValues and getAllParamValues::
+
+    device = SimulatedDevice.from_replies(all_values, all_params, latency=0.2)
+    async with Simulator([device] * 10) as sim:
+        sma = SMAWebConnect(session, sim.urls[0], "pass")
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import random
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Any, Self
+
+from aiohttp import web
+
+from .const import (
+    ERR_SESSION,
+    URL_ALL_PARAMS,
+    URL_ALL_VALUES,
+    URL_DASH_LOGGER,
+    URL_DASH_VALUES,
+    URL_LOGGER,
+    URL_LOGIN,
+    URL_LOGOUT,
+    URL_VALUES,
+)
+
+_LOG = logging.getLogger(__name__)
+
+ERR_MAX_SESSIONS = 503
+
+
+@dataclass
+class SimulatedDevice:
+    """Configuration and state of a simulated device."""
+
+    values: dict[str, Any]
+    """Values served by getAllOnlValues and getValues, by key."""
+    params: dict[str, Any] = field(default_factory=dict)
+    """Parameters served by getAllParamValues and getValues, by key."""
+    uid: str = "0199-xxxxx385"
+    """Identifier the results are returned under."""
+    password: str = "pass"
+    """Password required to login."""
+    max_sessions: int = 4
+    """Logins refused with err 503 while this many sessions are open."""
+    session_timeout: float | None = None
+    """Seconds after which an idle session expires."""
+    latency: float = 0
+    """Seconds to wait before every reply."""
+    jitter: float = 0
+    """Up to this many seconds are randomly added to latency."""
+    disconnect_rate: float = 0
+    """Fraction of the requests whose connection is dropped without a reply."""
+    dash_keys: tuple[str, ...] | None = None
+    """Keys served by getDashValues, all values if None."""
+    logger: dict[int, list[dict[str, Any]]] = field(default_factory=dict)
+    """Log entries with "t" and "v" served by getLogger, by log id."""
+    dash_logger: dict[str, Any] = field(default_factory=dict)
+    """Result served by getDashLogger."""
+
+    requests: Counter[str] = field(default_factory=Counter, init=False, repr=False)
+    """Number of requests received, by path."""
+    sessions: dict[str, float] = field(default_factory=dict, init=False, repr=False)
+    """Open sessions and their last use."""
+    connections: set[tuple] = field(default_factory=set, init=False, repr=False)
+    """Address of every client connection."""
+
+    @classmethod
+    def from_replies(
+        cls, all_values: dict, all_params: dict | None = None, **kwargs: Any
+    ) -> Self:
+        """Create a device from its replies to getAllOnlValues and getAllParamValues.
+
+        Args:
+            all_values (dict): Reply to getAllOnlValues, {"result": {uid: values}}
+            all_params (dict, optional): Reply to getAllParamValues
+            **kwargs: Further SimulatedDevice fields
+
+        Returns:
+            SimulatedDevice: The device
+
+        """
+        uid, values = next(iter(all_values["result"].items()))
+        params: dict = next(iter(all_params["result"].values())) if all_params else {}
+        return cls(
+            values=copy.deepcopy(values),
+            params=copy.deepcopy(params),
+            uid=uid,
+            **kwargs,
+        )
+
+
+class Simulator:
+    """Serve simulated devices on localhost."""
+
+    def __init__(
+        self,
+        devices: list[SimulatedDevice],
+        host: str = "127.0.0.1",
+        seed: int | None = None,
+    ):
+        """Init the simulator.
+
+        Args:
+            devices (list): The devices, the same device may be listed several times
+            host (str, optional): Address to listen on. Defaults to localhost.
+            seed (int, optional): Seed for latency jitter, disconnects and session ids
+
+        """
+        self.devices = [replace(dev) for dev in devices]
+        self.host = host
+        self.urls: list[str] = []
+        """Url of every device, available once started."""
+        self._rng = random.Random(seed)
+        self._runners: list[web.AppRunner] = []
+
+    async def __aenter__(self) -> Self:
+        """Start serving."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        """Stop serving."""
+        await self.stop()
+
+    async def start(self) -> None:
+        """Start serving every device on a free port."""
+        for device in self.devices:
+            runner = web.AppRunner(self._app(device), handle_signals=False)
+            await runner.setup()
+            self._runners.append(runner)
+            await web.TCPSite(runner, self.host, 0).start()
+            port = runner.addresses[0][1]
+            self.urls.append(f"http://{self.host}:{port}")
+        _LOG.debug("Simulating %d devices", len(self.devices))
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        while self._runners:
+            await self._runners.pop().cleanup()
+        self.urls.clear()
+
+    def _app(self, device: SimulatedDevice) -> web.Application:
+        """Create the web application of a device."""
+        app = web.Application(middlewares=[self._middleware(device)])
+        handlers = {
+            URL_LOGIN: self._login,
+            URL_LOGOUT: self._logout,
+            URL_VALUES: self._values,
+            URL_ALL_VALUES: self._all_values,
+            URL_ALL_PARAMS: self._all_params,
+            URL_LOGGER: self._logger,
+            URL_DASH_LOGGER: self._dash_logger,
+            URL_DASH_VALUES: self._dash_values,
+        }
+        for path, handler in handlers.items():
+
+            async def _handle(
+                request: web.Request, handler: Any = handler
+            ) -> web.Response:
+                body = await request.text()
+                payload: dict = json.loads(body) if body else {}
+                return web.json_response(await handler(device, request, payload))
+
+            app.router.add_post(path, _handle)
+        return app
+
+    def _middleware(self, device: SimulatedDevice) -> Any:
+        """Count requests, add latency and drop connections."""
+
+        @web.middleware
+        async def _middleware(request: web.Request, handler: Any) -> web.StreamResponse:
+            device.requests[request.path] += 1
+            if request.transport is not None:
+                device.connections.add(request.transport.get_extra_info("peername"))
+            delay = device.latency + self._rng.uniform(0, device.jitter)
+            if delay:
+                await asyncio.sleep(delay)
+            if self._rng.random() < device.disconnect_rate:
+                if request.transport is not None:
+                    request.transport.close()
+                raise asyncio.CancelledError
+            return await handler(request)
+
+        return _middleware
+
+    def _session_valid(self, device: SimulatedDevice, request: web.Request) -> bool:
+        """Check the session of a request, and mark it used."""
+        now = asyncio.get_running_loop().time()
+        if device.session_timeout is not None:
+            for sid, used in list(device.sessions.items()):
+                if now - used > device.session_timeout:
+                    del device.sessions[sid]
+        sid = request.query.get("sid")
+        if sid not in device.sessions:
+            return False
+        device.sessions[sid] = now
+        return True
+
+    def _result(self, device: SimulatedDevice, result: Any) -> dict:
+        """Wrap a result as the device does."""
+        return {"result": {device.uid: result}}
+
+    async def _login(
+        self, device: SimulatedDevice, request: web.Request, payload: dict
+    ) -> dict:
+        """Open a session."""
+        if payload.get("pass") != device.password:
+            return {"result": {"sid": None}}
+        self._session_valid(device, request)
+        if len(device.sessions) >= device.max_sessions:
+            return {"err": ERR_MAX_SESSIONS}
+        sid = f"{self._rng.getrandbits(64):016X}"
+        device.sessions[sid] = asyncio.get_running_loop().time()
+        return {"result": {"sid": sid}}
+
+    async def _logout(
+        self, device: SimulatedDevice, request: web.Request, payload: dict
+    ) -> dict:
+        """Close a session."""
+        device.sessions.pop(request.query.get("sid", ""), None)
+        return {"result": {"isLogin": False}}
+
+    async def _values(
+        self, device: SimulatedDevice, request: web.Request, payload: dict
+    ) -> dict:
+        """Get the values of the requested keys."""
+        if not self._session_valid(device, request):
+            return {"err": ERR_SESSION}
+        result = {}
+        for key in payload.get("keys", []):
+            if key in device.values:
+                result[key] = device.values[key]
+            elif key in device.params:
+                result[key] = device.params[key]
+        return self._result(device, result)
+
+    async def _all_values(
+        self, device: SimulatedDevice, request: web.Request, payload: dict
+    ) -> dict:
+        """Get all values."""
+        if not self._session_valid(device, request):
+            return {"err": ERR_SESSION}
+        return self._result(device, device.values)
+
+    async def _all_params(
+        self, device: SimulatedDevice, request: web.Request, payload: dict
+    ) -> dict:
+        """Get all parameters."""
+        if not self._session_valid(device, request):
+            return {"err": ERR_SESSION}
+        return self._result(device, device.params)
+
+    async def _logger(
+        self, device: SimulatedDevice, request: web.Request, payload: dict
+    ) -> dict:
+        """Get the log entries between tStart and tEnd."""
+        if not self._session_valid(device, request):
+            return {"err": ERR_SESSION}
+        start, end = payload.get("tStart", 0), payload.get("tEnd", 0)
+        return self._result(
+            device,
+            [
+                entry
+                for entry in device.logger.get(payload.get("key", 0), [])
+                if start <= entry["t"] <= end
+            ],
+        )
+
+    async def _dash_logger(
+        self, device: SimulatedDevice, request: web.Request, payload: dict
+    ) -> dict:
+        """Get the dashboard loggers."""
+        if not self._session_valid(device, request):
+            return {"err": ERR_SESSION}
+        return self._result(device, device.dash_logger)
+
+    async def _dash_values(
+        self, device: SimulatedDevice, request: web.Request, payload: dict
+    ) -> dict:
+        """Get the dashboard values, no session required."""
+        if device.dash_keys is None:
+            return self._result(device, device.values)
+        return self._result(
+            device,
+            {
+                key: device.values[key]
+                for key in device.dash_keys
+                if key in device.values
+            },
+        )
@@ -6,22 +6,29 @@ Source: http://www.github.com/kellerza/pysma
 """
 
 import asyncio
+import contextlib
 import copy
 import json
 import logging
-import pkgutil
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator, Mapping
 from dataclasses import InitVar, dataclass, field
 from typing import Any
 
 import jmespath
 from aiohttp import ClientSession, ClientTimeout, client_exceptions, hdrs
 
+from .breaker import CircuitBreaker, CircuitState
 from .const import (
     DEFAULT_LANG,
-    DEFAULT_REQUEST_RETRIES,
-    DEFAULT_TIMEOUT,
+    DEFAULT_LOGGER_CONCURRENCY,
+    DEFAULT_LOGGER_WINDOW,
+    DEFAULT_SESSION_TIMEOUT,
     DEVICE_INFO,
     ENERGY_METER_VIA_INVERTER,
+    ERR_SESSION,
     GENERIC_SENSORS,
     OPTIMIZERS_VIA_INVERTER,
     URL_ALL_PARAMS,
@@ -37,11 +44,25 @@ from .const import (
 from .definitions import webconnect
 from .exceptions import (
     SmaAuthenticationException,
+    SmaCircuitOpenException,
     SmaConnectionException,
+    SmaException,
     SmaReadException,
 )
-from .helpers import DeviceInfo, ensure_string
-from .sensor import Sensors
+from .helpers import (
+    DeviceInfo,
+    JsonLoads,
+    ensure_string,
+    json_decoder,
+    values_decoder,
+)
+from .layout import LayoutStore, dump_layout, layout_key, load_layout
+from .limiter import AdaptiveLimiter
+from .metrics import Instrumentation
+from .retry import RetryPolicy
+from .sensor import SensorChange, Sensors
+from .session import SessionStore, SharedSession
+from .translations import cached_translations, get_translations
 
 _LOG = logging.getLogger(__name__)
 
@@ -62,12 +83,40 @@ class SMAWebConnect:
     """UID used for data extraction."""
     lang: str = DEFAULT_LANG
     """Language code of file to retrieve."""
+    parallel_discovery: bool = True
+    """Read all values and parameters concurrently in get_sensors."""
+    limiter: AdaptiveLimiter = field(default_factory=AdaptiveLimiter, repr=False)
+    """Limit of the concurrent requests sent to the device."""
+    retry: RetryPolicy = field(default_factory=RetryPolicy, repr=False)
+    """When and how fast to retry failed requests."""
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker, repr=False)
+    """Fails fast when the device is not responding."""
+    metrics: Instrumentation | None = field(default=None, repr=False)
+    """Receives every request, see pysma.metrics."""
+    json_loads: JsonLoads = field(default_factory=json_decoder, repr=False)
+    """Decodes replies, orjson or msgspec if installed, see helpers.json_decoder."""
+    decode_in_thread: int | None = None
+    """Replies of at least this many bytes are decoded in a thread."""
+    decode_enabled_only: bool = False
+    """Only decode the values of enabled sensors in read, see values_decoder."""
+    session_timeout: float | None = DEFAULT_SESSION_TIMEOUT
+    """Seconds a session may be idle, before the device expires it, after which
+    reads log in again instead of failing first."""
+    session_max_age: float | None = None
+    """Seconds after which reads log in again, however active the session is."""
+    session_store: SessionStore | None = field(default=None, repr=False)
+    """Shares the session with other clients of the device, see pysma.session."""
 
     _new_session_data: dict | None = field(init=False, repr=False)
     _sid: str | None = field(init=False, repr=False)
-    _l10n: dict | None = field(init=False, repr=False)
+    _sid_created: float = field(default=0.0, init=False, repr=False)
+    _sid_used: float = field(default=0.0, init=False, repr=False)
+    _l10n: Mapping[str, str] | None = field(init=False, repr=False)
     _devclass: str | None = field(init=False, repr=False)
     _device_info_sensors: Sensors = field(init=False, repr=False)
+    _login_lock: asyncio.Lock = field(init=False, repr=False)
+    _holder: str = field(init=False, repr=False)
+    _lease_renewed: float = field(default=0.0, init=False, repr=False)
 
     def __post_init__(
         self,
@@ -92,62 +141,193 @@ class SMAWebConnect:
             self.url = "http://" + self.url
 
         self._sid = None
+        self._sid_created = self._sid_used = time.monotonic()
         self._l10n = None
         self._devclass = None
         self._device_info_sensors = Sensors(webconnect.sensor_map[DEVICE_INFO])
+        self._login_lock = asyncio.Lock()
+        self._holder = uuid.uuid4().hex
 
     async def _request_json(
-        self, method: str, url: str, **kwargs: dict[str, Any]
+        self,
+        method: str,
+        url: str,
+        loads: JsonLoads | None = None,
+        **kwargs: dict[str, Any],
     ) -> dict:
         """Request json data for requests.
 
         Args:
             method (str): HTTP method to use
             url (str): URL to do request to
+            loads (JsonLoads, optional): Decoder for the reply. Defaults to json_loads.
             **kwargs (dict): Additional request parameters
 
         Raises:
             SmaConnectionException: Connection to device failed
+            SmaCircuitOpenException: The device failed repeatedly, see breaker
 
         Returns:
             dict: json returned by device
 
         """
-        if self._sid:
+        if self.breaker.state is not CircuitState.CLOSED:
+            await self._probe()
+
+        sid = self._sid
+        if sid:
             kwargs.setdefault("params", {})
-            kwargs["params"]["sid"] = self._sid
+            kwargs["params"]["sid"] = sid
+
+        try:
+            res_json = await self._send(method, url, self.retry, loads, **kwargs)
+        except SmaConnectionException:
+            self._record_failure()
+            raise
+        self.breaker.record_success()
+        if sid and sid == self._sid:
+            self._sid_used = time.monotonic()
+        return res_json
+
+    def _record_failure(self) -> None:
+        """Record a failed request in the circuit breaker."""
+        was_closed = self.breaker.state is CircuitState.CLOSED
+        self.breaker.record_failure()
+        if was_closed and self.breaker.state is CircuitState.OPEN:
+            _LOG.warning(
+                "%s: %d consecutive failures, not sending requests for %ss",
+                self.url,
+                self.breaker.failures,
+                self.breaker.cooldown,
+            )
+
+    async def _probe(self) -> None:
+        """Probe a device with an open circuit using a dashboard request.
+
+        Raises:
+            SmaCircuitOpenException: The circuit is open, or the probe failed
+
+        """
+        if not self.breaker.acquire_probe():
+            raise SmaCircuitOpenException(
+                f"{self.url} is not responding, "
+                f"next attempt in {self.breaker.retry_in:.0f}s"
+            )
+        _LOG.debug("%s: Probing device", self.url)
+        try:
+            await self._send(
+                hdrs.METH_POST,
+                URL_DASH_VALUES,
+                RetryPolicy(attempts=1, timeout=self.retry.timeout),
+                data=json.dumps({"destDev": [], "keys": []}),
+                headers={"content-type": "application/json"},
+            )
+        except SmaConnectionException as exc:
+            self._record_failure()
+            raise SmaCircuitOpenException(
+                f"{self.url} is not responding: {exc}"
+            ) from exc
+        except BaseException:
+            # Cancelled, the next request probes again
+            self.breaker.release_probe()
+            raise
+        self.breaker.record_success()
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        policy: RetryPolicy,
+        loads: JsonLoads | None = None,
+        **kwargs: Any,
+    ) -> dict:
+        """Send a request, retrying according to policy.
 
+        Raises:
+            SmaConnectionException: Connection to device failed
+
+        Returns:
+            dict: json returned by device
+
+        """
         _LOG.debug("Sending %s request to %s: %s", method, url, kwargs)
 
-        max_retries = DEFAULT_REQUEST_RETRIES
-        for retry in range(max_retries):
+        start = time.monotonic()
+        end = policy.start()
+        attempt = 0
+        while True:
             try:
-                async with self.session.request(
-                    method,
-                    self.url + url,
-                    timeout=ClientTimeout(total=DEFAULT_TIMEOUT),
-                    **kwargs,  # type:ignore[arg-type]
-                ) as res:
-                    res_json = await res.json()
-                    _LOG.debug("Received reply %s", res_json)
-                    return res_json or {}
-            except (client_exceptions.ContentTypeError, json.decoder.JSONDecodeError):
-                _LOG.warning("Request to %s did not return a valid json.", url)
-                break
+                async with (
+                    self.limiter.acquire(),
+                    self.session.request(
+                        method,
+                        self.url + url,
+                        timeout=ClientTimeout(
+                            total=policy.attempt_timeout(attempt, end)
+                        ),
+                        **kwargs,
+                    ) as res,
+                ):
+                    body = await res.read()
+                    decode_start = time.monotonic()
+                    try:
+                        res_json = await self._decode(body, loads or self.json_loads)
+                    except ValueError:
+                        _LOG.warning("Request to %s did not return a valid json.", url)
+                        if self.metrics is not None:
+                            self.metrics.on_error(url, "invalid_json")
+                        return {}
+                    decode_end = time.monotonic()
+                # Reported outside the limiter, errors of the metrics are not
+                # failures of the device
+                if self.metrics is not None:
+                    self.metrics.on_request(
+                        url, decode_end - start, len(body), decode_end - decode_start
+                    )
+                _LOG.debug("Received reply %s", res_json)
+                return res_json or {}
             except (
-                client_exceptions.ServerDisconnectedError,
                 client_exceptions.ClientError,
                 asyncio.exceptions.TimeoutError,
+                *policy.retry_on,
             ) as exc:
-                if (retry + 1) < max_retries:
-                    _LOG.debug("Retrying %s (%d/%d)", url, retry + 1, max_retries)
-                    continue
+                delay = policy.retry_delay(attempt, exc, end)
+                if delay is None:
+                    if self.metrics is not None:
+                        self.metrics.on_error(
+                            url,
+                            "timeout"
+                            if isinstance(exc, asyncio.exceptions.TimeoutError)
+                            else "connection",
+                        )
+                    raise SmaConnectionException(
+                        f"Could not connect to SMA at {self.url}: {exc}"
+                    ) from exc
+
+                attempt += 1
+                if self.metrics is not None:
+                    self.metrics.on_retry(url)
+                _LOG.debug(
+                    "Retrying %s in %.2fs (%d/%d)",
+                    url,
+                    delay,
+                    attempt,
+                    policy.attempts - 1,
+                )
+                await asyncio.sleep(delay)
+
+    async def _decode(self, body: bytes, loads: JsonLoads) -> Any:
+        """Decode a reply, in a thread if it is large.
 
-                raise SmaConnectionException(
-                    f"Could not connect to SMA at {self.url}: {exc}"
-                ) from exc
+        Raises:
+            ValueError: The reply is not valid json
 
-        return {}
+        """
+        if not body.strip():
+            return None
+        if self.decode_in_thread is not None and len(body) >= self.decode_in_thread:
+            return await asyncio.to_thread(loads, body)
+        return loads(body)
 
     async def _get_json(self, url: str) -> dict:
         """Get json data for requests.
@@ -162,13 +342,17 @@ class SMAWebConnect:
         return await self._request_json(hdrs.METH_GET, url)
 
     async def _post_json(
-        self, url: str, payload: dict[str, Any] | None = None
+        self,
+        url: str,
+        payload: dict[str, Any] | None = None,
+        loads: JsonLoads | None = None,
     ) -> dict[str, Any]:
         """Post json data for requests.
 
         Args:
             url (str): URL to do POST request to
             payload (dict, optional): payload to send to device. Defaults to empty dict.
+            loads (JsonLoads, optional): Decoder for the reply. Defaults to json_loads.
 
         Returns:
             dict: json returned by device
@@ -182,20 +366,27 @@ class SMAWebConnect:
             "headers": {"content-type": "application/json"},
         }
 
+        if loads is not None:
+            params["loads"] = loads
+
         return await self._request_json(hdrs.METH_POST, url, **params)
 
-    async def _read_l10n(self) -> dict:
+    async def read_l10n(self) -> Mapping[str, str]:
         """Read language file. Returns cached value on subsequent calls.
 
+        Translations are shared by all instances, see pysma.translations.
+
         Returns:
-            dict: Dictionary containing translation keys and their localized strings.
+            Mapping: Read-only mapping of tag ids and their localized strings.
 
         """
         if self._l10n is not None:
             return self._l10n
 
         # Try to load the requested language from package
-        self._l10n = await asyncio.to_thread(self._load_l10n_from_package, self.lang)
+        self._l10n = cached_translations(self.lang)
+        if self._l10n is None:
+            self._l10n = await asyncio.to_thread(get_translations, self.lang)
 
         # Fallback to default language if requested not found or empty
         if not self._l10n and self.lang != DEFAULT_LANG:
@@ -204,34 +395,25 @@ class SMAWebConnect:
                 self.lang,
                 DEFAULT_LANG,
             )
-            self._l10n = await asyncio.to_thread(
-                self._load_l10n_from_package, DEFAULT_LANG
-            )
+            self._l10n = await asyncio.to_thread(get_translations, DEFAULT_LANG)
 
         return self._l10n
 
-    def _load_l10n_from_package(self, locale: str) -> dict:
-        """Load JSON translation file from package resources.
-
-        Args:
-            locale (str): Locale code, e.g., "en-US" or "de-DE".
-
-        Returns:
-            dict: Dictionary containing translation keys and localized strings. Empty dict if file
-            not found or cannot be loaded.
-
-        """
-        data = pkgutil.get_data("pysma", f"l10n/{locale}.json")
-        if data is None:
-            return {}
-        return json.loads(data)
-
-    async def _read_body(self, url: str, payload: dict) -> dict[str, Any]:
+    async def _read_body(
+        self,
+        url: str,
+        payload: dict,
+        login: bool = True,
+        loads: JsonLoads | None = None,
+    ) -> dict[str, Any]:
         """Parse the json returned by the device and extract result.
 
         Args:
             url (str): URL to reqquest data from
             payload (dict): payload to send to device
+            login (bool, optional): Login first if a password is set. Defaults to True.
+            loads (JsonLoads, optional): Decoder for the reply. Defaults to json_loads.
+
         Raises:
             SmaReadException: The json returned by the device was in an unexpected format
 
@@ -239,14 +421,34 @@ class SMAWebConnect:
             dict: json result
 
         """
-        if self._sid is None and self._new_session_data is not None:
-            await self.new_session()
-        body = await self._post_json(url, payload)
-
-        # On the first error we close the session which will re-login
+        login = login and self._new_session_data is not None
+        if login:
+            await self._ensure_session()
+        sid = self._sid
+        body = await self._post_json(url, payload, loads)
         err = body.get("err")
 
+        if err is not None and login:
+            # Login again and retry once, the session probably expired
+            _LOG.debug("%s: error %s, logging in again to retry %s", self.url, err, url)
+            if self.metrics is not None:
+                self.metrics.on_error(url, str(err))
+            if self._sid == sid:
+                if err == ERR_SESSION:
+                    # The device dropped the session, there is nothing to log out
+                    self._sid = None
+                else:
+                    # The session may still be valid, free it on the device
+                    with contextlib.suppress(SmaException):
+                        await self.close_session()
+            await self._ensure_session(stale=sid)
+            body = await self._post_json(url, payload, loads)
+            err = body.get("err")
+
+        # On a repeated error we close the session which will re-login
         if err is not None:
+            if self.metrics is not None:
+                self.metrics.on_error(url, str(err))
             _LOG.warning(
                 "%s: error detected, closing session to force another login attempt, got: %s",
                 self.url,
@@ -273,6 +475,127 @@ class SMAWebConnect:
 
         return result_body
 
+    def _session_expired(self) -> bool:
+        """Check if the session is about to be expired by the device."""
+        now = time.monotonic()
+        if self.session_timeout is not None and (
+            now - self._sid_used >= self.session_timeout
+        ):
+            return True
+        return self.session_max_age is not None and (
+            now - self._sid_created >= self.session_max_age
+        )
+
+    async def _ensure_session(self, stale: str | None = None) -> None:
+        """Login if there is no session, or if it is about to expire.
+
+        Args:
+            stale (str, optional): A sid rejected by the device, not to be used
+                from the session store.
+
+        """
+        if self._sid is not None and self._session_expired():
+            async with self._login_lock:
+                if self._sid is not None and self._session_expired():
+                    # Other clients may have used the shared session since
+                    await self._renew_lease()
+                if self._sid is not None and self._session_expired():
+                    _LOG.debug("%s: Session expired, logging in again", self.url)
+                    stale = self._sid
+                    # The device may not have expired it yet, free it
+                    with contextlib.suppress(SmaException):
+                        await self.close_session()
+        if self._sid is not None and self._lease_expiring():
+            async with self._login_lock:
+                if self._sid is not None and self._lease_expiring():
+                    await self._renew_lease()
+        if self._sid is None:
+            # Concurrent reads share a single login
+            async with self._login_lock:
+                if self._sid is None and not await self._acquire_session(stale):
+                    await self.new_session()
+
+    @property
+    def _session_key(self) -> str:
+        """Key of the session in the session store."""
+        right = self._new_session_data["right"] if self._new_session_data else ""
+        return f"{self.url} {right}"
+
+    def _lease_expiring(self) -> bool:
+        """Check if the lease on a shared session should be renewed."""
+        return self.session_store is not None and (
+            time.monotonic() - self._lease_renewed >= self.session_store.lease / 2
+        )
+
+    def _use_session(self, session: SharedSession) -> None:
+        """Use a session from the session store, or update its last use."""
+        now = time.monotonic()
+        used = now - max(0.0, time.time() - session.used)
+        if session.sid == self._sid:
+            used = max(used, self._sid_used)
+        else:
+            _LOG.debug("%s: Shared SID: %s", self.url, session.sid)
+        self._sid = session.sid
+        self._sid_created = now - max(0.0, time.time() - session.created)
+        self._sid_used = used
+        self._lease_renewed = now
+
+    async def _acquire_session(self, stale: str | None) -> bool:
+        """Use the session of another client from the session store.
+
+        Returns:
+            bool: A stored session is used
+
+        """
+        if self.session_store is None:
+            return False
+        session = await asyncio.to_thread(
+            self.session_store.acquire, self._session_key, self._holder, stale
+        )
+        if session is None:
+            return False
+        self._use_session(session)
+        return True
+
+    async def _renew_lease(self) -> None:
+        """Renew the lease on the shared session, switching to a newer session.
+
+        The last use of the session is shared with the other clients. A
+        replaced session is logged out by the last client to switch from it.
+        """
+        if self.session_store is None or self._sid is None:
+            return
+        session = await asyncio.to_thread(
+            self.session_store.acquire,
+            self._session_key,
+            self._holder,
+            used=time.time() - (time.monotonic() - self._sid_used),
+        )
+        self._lease_renewed = time.monotonic()
+        if session is None:
+            # The session was removed from the store, e.g. with its file
+            await self._publish_session()
+            return
+        if session.sid != self._sid and await asyncio.to_thread(
+            self.session_store.release, self._session_key, self._holder, self._sid
+        ):
+            with contextlib.suppress(SmaException):
+                await self._post_json(URL_LOGOUT)
+        self._use_session(session)
+
+    async def _publish_session(self) -> None:
+        """Share the current session in the session store."""
+        if self.session_store is None or self._sid is None:
+            return
+        created = time.time() - (time.monotonic() - self._sid_created)
+        await asyncio.to_thread(
+            self.session_store.publish,
+            self._session_key,
+            self._holder,
+            SharedSession(self._sid, created),
+        )
+        self._lease_renewed = time.monotonic()
+
     async def new_session(self) -> bool:
         """Establish a new session.
 
@@ -285,13 +608,20 @@ class SMAWebConnect:
         """
         body = await self._post_json(URL_LOGIN, self._new_session_data)
         self._sid = jmespath.search("result.sid", body)
+        if self.metrics is not None:
+            self.metrics.on_login()
         if self._sid:
             _LOG.debug("New SID: %s", self._sid)
+            self._sid_created = self._sid_used = time.monotonic()
+            if self.session_store is not None:
+                await self._publish_session()
             return True
 
         err = body.pop("err", None)
         msg = "Could not start session: %s"
 
+        if err and self.metrics is not None:
+            self.metrics.on_error(URL_LOGIN, str(err))
         if err:
             if err == 503:
                 _LOG.error(msg, "Max amount of sessions reached")
@@ -307,15 +637,56 @@ class SMAWebConnect:
 
         raise SmaAuthenticationException()
 
-    async def close_session(self) -> None:
-        """Close the session login."""
+    async def close_session(self, logout: bool = True) -> None:
+        """Close the session login.
+
+        A session shared through the session store is only logged out by the
+        last client using it.
+
+        Args:
+            logout (bool, optional): Log out of the device, False to only drop
+                the session, e.g. when the device is not reachable. Defaults to True.
+
+        """
         if self._sid is None:
             return
         try:
-            await self._post_json(URL_LOGOUT)
+            if (
+                self.session_store is None
+                or await asyncio.to_thread(
+                    self.session_store.release,
+                    self._session_key,
+                    self._holder,
+                    self._sid,
+                )
+            ) and logout:
+                await self._post_json(URL_LOGOUT)
         finally:
             self._sid = None
 
+    async def warm_up(self) -> bool:
+        """Open a connection to the device ahead of a read.
+
+        Sends a HEAD request for the start page, the connection is kept for the
+        next request if the session keeps connections alive, see pysma.connection.
+
+        Returns:
+            bool: The device replied
+
+        """
+        if self.breaker.state is not CircuitState.CLOSED:
+            return False
+        try:
+            async with self.session.head(
+                self.url + "/",
+                timeout=ClientTimeout(total=self.retry.timeout),
+                allow_redirects=False,
+            ):
+                return True
+        except (client_exceptions.ClientError, asyncio.exceptions.TimeoutError) as exc:
+            _LOG.debug("%s: Warming up the connection failed: %s", self.url, exc)
+            return False
+
     async def read(self, sensors: Sensors) -> bool:
         """Read a set of keys.
 
@@ -326,34 +697,83 @@ class SMAWebConnect:
             bool: reading was successful
 
         """
+        await self._read(sensors)
+        return True
+
+    async def read_changes(
+        self, sensors: Sensors, deadbands: Mapping[str, float] | None = None
+    ) -> list[SensorChange]:
+        """Read a set of keys and return the sensors that changed.
+
+        Changes are relative to the value last reported, so a value that drifts
+        slowly is reported once it moved beyond the deadband. Sensors with their own
+        deadband, see Sensor, use that instead.
+
+        Args:
+            sensors (Sensors): Sensors object containing Sensor objects to read
+            deadbands (Mapping[str, float], optional): Minimum change per unit,
+                e.g. {"W": 10, "V": 1}. Defaults to reporting every change.
+
+        Returns:
+            list: The changed sensors with their previous and new value
+
+        """
+        result_body = await self._read(sensors)
+        changes = []
+        for sen in sensors:
+            if sen.enabled and sen.key in result_body:
+                change = sen.pop_change(
+                    deadbands.get(sen.unit) if deadbands and sen.unit else None
+                )
+                if change is not None:
+                    changes.append(change)
+        return changes
+
+    async def _read(self, sensors: Sensors) -> dict[str, Any]:
+        """Read a set of keys and decode the values of sensors.
+
+        Returns:
+            dict: The values returned by the device
+
+        """
+        keys = list({s.key for s in sensors if s.enabled})
+        loads = (
+            values_decoder(keys, self.json_loads) if self.decode_enabled_only else None
+        )
         if self._new_session_data is None:
             payload: dict[str, Any] = {"destDev": [], "keys": []}
-            result_body = await self._read_body(URL_DASH_VALUES, payload)
+            result_body = await self._read_body(URL_DASH_VALUES, payload, loads=loads)
         else:
-            payload = {
-                "destDev": [],
-                "keys": list({s.key for s in sensors if s.enabled}),
-            }
-            result_body = await self._read_body(URL_VALUES, payload)
-
-        notfound = []
-        l10n = await self._read_l10n()
-        for sen in sensors:
-            if sen.enabled:
-                if sen.key in result_body:
-                    sen.extract_value(result_body, l10n)
-                    continue
+            payload = {"destDev": [], "keys": keys}
+            result_body = await self._read_body(URL_VALUES, payload, loads=loads)
 
-                notfound.append(f"{sen.name} [{sen.key}]")
+        l10n = await self.read_l10n()
+        notfound = sensors.decode_values(result_body, l10n)
+
+        if sensors.recorder is not None:
+            sensors.recorder.record()
 
         if notfound:
-            _LOG.info(
+            # The dashboard only serves a few keys, see pysma.dashboard
+            _LOG.log(
+                logging.DEBUG if self._new_session_data is None else logging.INFO,
                 "No values for sensors: %s. Response from inverter: %s",
-                ",".join(notfound),
+                ",".join(f"{sen.name} [{sen.key}]" for sen in notfound),
                 result_body,
             )
 
-        return True
+        return result_body
+
+    async def read_dash_values(self) -> dict[str, Any]:
+        """Read the dashboard values, without login.
+
+        Returns:
+            dict: The values of the keys served by the dashboard, see pysma.dashboard
+
+        """
+        return await self._read_body(
+            URL_DASH_VALUES, {"destDev": [], "keys": []}, login=False
+        )
 
     async def read_dash_logger(self) -> dict:
         """Read the dash loggers.
@@ -397,6 +817,67 @@ class SMAWebConnect:
 
         return result_body
 
+    async def iter_logger(
+        self,
+        log_id: int,
+        start: int,
+        end: int,
+        window: int = DEFAULT_LOGGER_WINDOW,
+        concurrency: int = DEFAULT_LOGGER_CONCURRENCY,
+    ) -> AsyncIterator[dict]:
+        """Read a logging key in windows and yield the entries in timestamp order.
+
+        Long ranges are split into windows of at most window seconds, of which up to
+        concurrency are read at the same time. Entries are yielded as each window
+        arrives, entries repeated at a window boundary are only yielded once.
+
+        Args:
+            log_id (int): The ID of the log to read, see read_logger.
+            start (int): Start timestamp in seconds.
+            end (int): End timestamp in seconds.
+            window (int, optional): Seconds per request. Defaults to one day.
+            concurrency (int, optional): Windows read at the same time. Defaults to 2.
+
+        Yields:
+            dict: The log entries returned by the device
+
+        """
+        if window < 1 or concurrency < 1:
+            raise ValueError("window and concurrency should be at least 1")
+        start, end = min(start, end), max(start, end)
+
+        pending: deque[asyncio.Task[list]] = deque()
+        last_t: int | None = None
+
+        def _new(entries: list) -> list:
+            nonlocal last_t
+            entries = sorted(entries, key=lambda entry: entry.get("t", 0))
+            if last_t is not None:
+                entries = [entry for entry in entries if entry.get("t", 0) > last_t]
+            if entries:
+                last_t = entries[-1].get("t", last_t)
+            return entries
+
+        try:
+            for w_start in range(start, max(end, start + 1), window):
+                pending.append(
+                    asyncio.create_task(
+                        self.read_logger(log_id, w_start, min(w_start + window, end))
+                    )
+                )
+                if len(pending) < concurrency:
+                    continue
+                for entry in _new(await pending.popleft()):
+                    yield entry
+
+            while pending:
+                for entry in _new(await pending.popleft()):
+                    yield entry
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
     async def device_info(self) -> DeviceInfo:
         """Read device info and return the results.
 
@@ -419,17 +900,69 @@ class SMAWebConnect:
         )
 
     async def _read_all_sensors(self) -> dict:
+        """Read all values and parameters of the device.
+
+        Both are read concurrently if parallel_discovery is set. If the device
+        returns an error, they are read again one after the other.
+        """
+        if self.parallel_discovery:
+            results = await asyncio.gather(
+                self._read_body(URL_ALL_VALUES, {"destDev": []}),
+                self._read_body(URL_ALL_PARAMS, {"destDev": []}),
+                return_exceptions=True,
+            )
+            errors = [res for res in results if isinstance(res, BaseException)]
+            if not errors:
+                return results[0] | results[1]  # type: ignore[operator]
+            for err in errors:
+                if not isinstance(err, SmaReadException):
+                    raise err
+            _LOG.debug(
+                "%s: Reading all values in parallel failed (%s), reading sequentially",
+                self.url,
+                errors[0],
+            )
+
         all_values = await self._read_body(URL_ALL_VALUES, {"destDev": []})
         all_params = await self._read_body(URL_ALL_PARAMS, {"destDev": []})
         return all_values | all_params
 
-    async def get_sensors(self) -> Sensors:
+    async def get_sensors(self, layout_store: LayoutStore | None = None) -> Sensors:
         """Get the sensors that are present on the device.
 
+        Args:
+            layout_store (LayoutStore, optional): Store to restore a previously
+                discovered layout from, keyed by serial and software version of the
+                device. Newly discovered layouts are saved to the store.
+
         Returns:
             Sensors: Sensors object containing Sensor objects
 
         """
+        if layout_store is None:
+            return await self._discover_sensors()
+
+        device_key = layout_key(await self.device_info())
+        if device_key is None:
+            _LOG.debug("Serial unknown, not using the stored sensor layout")
+            return await self._discover_sensors()
+
+        layout = await asyncio.to_thread(layout_store.load, device_key)
+        if layout is not None:
+            try:
+                sensors = load_layout(layout)
+            except ValueError as exc:
+                _LOG.warning("Ignoring stored layout for %s: %s", device_key, exc)
+            else:
+                _LOG.debug("Restored sensor layout for %s", device_key)
+                return sensors
+
+        sensors = await self._discover_sensors()
+        await asyncio.to_thread(layout_store.save, device_key, dump_layout(sensors))
+        return sensors
+
+    async def _discover_sensors(self) -> Sensors:
+        """Discover the sensors present on the device from all its values."""
         all_sensors = await self._read_all_sensors()
         sensor_keys = all_sensors.keys()
         device_sensors = Sensors()
@@ -0,0 +1,127 @@
+"""Translations of device tags, shared by all SMAWebConnect instances."""
+
+import json
+import logging
+import pkgutil
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from .const import DEFAULT_L10N_CACHE_SIZE
+
+_LOG = logging.getLogger(__name__)
+
+_CACHE: OrderedDict[str, Mapping[str, str]] = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_LOADING: dict[str, threading.Lock] = {}
+_CACHE_SIZE = DEFAULT_L10N_CACHE_SIZE
+
+
+def _load_from_package(locale: str) -> dict[str, str]:
+    """Load the tag translations of a locale from the package resources.
+
+    The language files contain many more strings than the tag ids returned by
+    devices, only the tag ids (numeric keys) are kept.
+
+    Args:
+        locale (str): Locale code, e.g., "en-US" or "de-DE".
+
+    Returns:
+        dict: Tag ids and their localized strings. Empty dict if the file was not
+        found or could not be loaded.
+
+    """
+    try:
+        data = pkgutil.get_data("pysma", f"l10n/{locale}.json")
+    except OSError:
+        data = None
+    if data is None:
+        return {}
+    try:
+        strings = json.loads(data)
+    except ValueError:
+        _LOG.warning("Language file '%s' could not be decoded", locale)
+        return {}
+    return {
+        key: str(val)
+        for key, val in strings.items()
+        if key.isdigit() and val is not None
+    }
+
+
+def cached_translations(locale: str) -> Mapping[str, str] | None:
+    """Get the tag translations of a locale, if already loaded.
+
+    Args:
+        locale (str): Locale code, e.g., "en-US" or "de-DE".
+
+    Returns:
+        Mapping: Tag ids and their localized strings. None if not loaded yet.
+
+    """
+    with _CACHE_LOCK:
+        translations = _CACHE.get(locale)
+        if translations is not None:
+            _CACHE.move_to_end(locale)
+        return translations
+
+
+def get_translations(locale: str) -> Mapping[str, str]:
+    """Get the tag translations of a locale.
+
+    Each locale is loaded once and shared as a read-only mapping. This is safe
+    to call from multiple threads, concurrent calls for the same locale wait for
+    a single load. The least recently used locales are dropped once more than
+    the cache size are loaded.
+
+    Args:
+        locale (str): Locale code, e.g., "en-US" or "de-DE".
+
+    Returns:
+        Mapping: Tag ids and their localized strings. Empty if not found.
+
+    """
+    translations = cached_translations(locale)
+    if translations is not None:
+        return translations
+
+    with _CACHE_LOCK:
+        loading = _LOADING.setdefault(locale, threading.Lock())
+
+    with loading:
+        # Another thread might have loaded it while we waited
+        translations = cached_translations(locale)
+        if translations is not None:
+            return translations
+
+        translations = MappingProxyType(_load_from_package(locale))
+        with _CACHE_LOCK:
+            _CACHE[locale] = translations
+            while len(_CACHE) > _CACHE_SIZE:
+                _CACHE.popitem(last=False)
+            _LOADING.pop(locale, None)
+
+    return translations
+
+
+def set_cache_size(size: int) -> None:
+    """Set the number of locales kept loaded.
+
+    Args:
+        size (int): Maximum number of locales, at least 1.
+
+    """
+    global _CACHE_SIZE  # noqa: PLW0603
+    if size < 1:
+        raise ValueError("Cache size should be at least 1")
+    with _CACHE_LOCK:
+        _CACHE_SIZE = size
+        while len(_CACHE) > _CACHE_SIZE:
+            _CACHE.popitem(last=False)
+
+
+def clear_cache() -> None:
+    """Clear the translations loaded so far."""
+    with _CACHE_LOCK:
+        _CACHE.clear()
@@ -0,0 +1,240 @@
+"""Benchmarks for the sensor extraction hot path.
+
+The payloads of real devices in conftest.SMA_TESTDATA are replayed through an
+in-memory session, so no network or mocking library is timed. Run from the
+repository root:
+
+    PYTHONPATH=src python -m tests.benchmark --save base.json
+    PYTHONPATH=src python -m tests.benchmark --compare base.json
+
+Every result is the best time per call of several repeats. Results are only
+comparable when taken on the same machine and Python version.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import timeit
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from pysma.const import GENERIC_SENSORS, URL_ALL_PARAMS, URL_ALL_VALUES, URL_VALUES
+from pysma.definitions.webconnect import sensor_map
+from pysma.sensor import Sensors
+from pysma.sma_webconnect import SMAWebConnect
+from pysma.translations import clear_cache, get_translations
+
+from .conftest import SMA_TESTDATA
+
+URL = "http://127.0.0.1"
+
+
+@dataclass
+class Dataset:
+    """The payloads of a device."""
+
+    name: str
+    values: str
+    """getAllOnlValues reply, as json."""
+    params: str
+    """getAllParamValues reply, as json."""
+
+    @property
+    def result_body(self) -> dict:
+        """The values of the device, as read() extracts them."""
+        return next(iter(json.loads(self.values)["result"].values()))
+
+
+DATASETS = [
+    Dataset(
+        str(param.id or idx), json.dumps(param.values[0]), json.dumps(param.values[1])
+    )
+    for idx, param in enumerate(SMA_TESTDATA)
+]
+
+
+class _Response:
+    """A reply of the in-memory session."""
+
+    def __init__(self, body: str):
+        self.body = body.encode()
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def json(self) -> Any:
+        return json.loads(self.body)
+
+
+class ReplaySession:
+    """In-memory replacement of aiohttp.ClientSession, replying to POST requests."""
+
+    def __init__(self, replies: dict[str, str]):
+        """Init the session.
+
+        Args:
+            replies (dict): The json body to reply per URL path
+
+        """
+        self.replies = replies
+
+    @asynccontextmanager
+    async def request(
+        self, method: str, url: str, **_: Any
+    ) -> AsyncIterator[_Response]:
+        """Reply to a request."""
+        yield _Response(self.replies[url.removeprefix(URL)])
+
+
+def new_sma(dataset: Dataset) -> SMAWebConnect:
+    """Create a device replying with the payloads of dataset."""
+    session = ReplaySession(
+        {
+            "/dyn/login.json": '{"result": {"sid": "ABCD"}}',
+            URL_VALUES: dataset.values,
+            URL_ALL_VALUES: dataset.values,
+            URL_ALL_PARAMS: dataset.params,
+        }
+    )
+    return SMAWebConnect(session, URL, "pass")  # type: ignore[arg-type]
+
+
+def bench_extract_value(dataset: Dataset) -> Callable[[], Any]:
+    """Extract the value of the generic sensors on the device, one at a time."""
+    body = dataset.result_body
+    sensors = [sen for sen in Sensors(sensor_map[GENERIC_SENSORS]) if sen.key in body]
+
+    def _run() -> None:
+        for sen in sensors:
+            sen.extract_value(body)
+
+    return _run
+
+
+def bench_decode_values(dataset: Dataset) -> Callable[[], Any]:
+    """Decode the values of all generic sensors, grouped by key."""
+    sensors = Sensors(sensor_map[GENERIC_SENSORS])
+    body = dataset.result_body
+    return lambda: sensors.decode_values(body)
+
+
+def bench_sensors_index(_: Dataset) -> Callable[[], Any]:
+    """Add all generic sensors, then get each by name and by key."""
+    definitions = sensor_map[GENERIC_SENSORS]
+
+    def _run() -> None:
+        sensors = Sensors(definitions)
+        for sen in definitions:
+            _ = sensors[sen.name]
+            _ = sensors[sen.key]
+
+    return _run
+
+
+def bench_get_sensors(dataset: Dataset) -> Callable[[], Any]:
+    """Discover the sensors of a device."""
+    sma = new_sma(dataset)
+    return lambda: asyncio.run(sma.get_sensors())
+
+
+def bench_l10n(_: Dataset) -> Callable[[], Any]:
+    """Load the translations from the package."""
+
+    def _run() -> None:
+        clear_cache()
+        get_translations("en-US")
+
+    return _run
+
+
+def bench_read(dataset: Dataset) -> Callable[[], Any]:
+    """Read all discovered sensors, including login and decoding the reply."""
+    sma = new_sma(dataset)
+    sensors = asyncio.run(sma.get_sensors())
+
+    async def _read() -> None:
+        sma._sid = None
+        await sma.read(sensors)
+
+    return lambda: asyncio.run(_read())
+
+
+BENCHMARKS: dict[str, tuple[Callable[[Dataset], Callable[[], Any]], bool]] = {
+    "extract_value": (bench_extract_value, True),
+    "decode_values": (bench_decode_values, True),
+    "sensors_index": (bench_sensors_index, False),
+    "get_sensors": (bench_get_sensors, True),
+    "l10n": (bench_l10n, False),
+    "read": (bench_read, True),
+}
+"""Benchmark factories by name, and whether they run for each dataset."""
+
+
+def cases() -> Iterator[tuple[str, Callable[[], Any]]]:
+    """Yield the name and callable of every benchmark case."""
+    for name, (factory, per_dataset) in BENCHMARKS.items():
+        for dataset in DATASETS if per_dataset else DATASETS[:1]:
+            yield (f"{name}[{dataset.name}]" if per_dataset else name), factory(dataset)
+
+
+def measure(func: Callable[[], Any], repeat: int = 5) -> float:
+    """Return the best time per call of func, in seconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def compare(
+    base: dict[str, float], results: dict[str, float], threshold: float
+) -> list[str]:
+    """Return the cases that are slower than base by more than threshold."""
+    return [
+        name
+        for name, seconds in results.items()
+        if name in base and seconds > base[name] * threshold
+    ]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", default="", help="only run cases containing this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", type=Path, help="save the results as json")
+    parser.add_argument("--compare", type=Path, help="compare to saved results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="fail if a case is this many times slower than the saved results",
+    )
+    args = parser.parse_args(argv)
+
+    base: dict[str, float] = (
+        json.loads(args.compare.read_text()) if args.compare else {}
+    )
+    results = {}
+    for name, func in cases():
+        if args.k not in name:
+            continue
+        results[name] = measure(func, args.repeat)
+        line = f"{name:<65} {results[name] * 1e6:>12.1f} us"
+        if name in base:
+            line += f" {results[name] / base[name]:>6.2f}x"
+        print(line)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    slower = compare(base, results, args.threshold)
+    if slower:
+        print(f"Slower than {args.compare}: {', '.join(slower)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,12 @@
 """Tests for pysma."""
 
+from collections.abc import Generator
+
 import pytest
+from aioresponses import aioresponses
 
 from pysma.helpers import DeviceInfo
+from pysma.simulator import SimulatedDevice
 
 MOCK_DEVICE = DeviceInfo(
     manufacturer="SMA",
@@ -6741,3 +6745,16 @@ SMA_TESTDATA = [
         id="Sunny Boy 1.5, no energy meter, no optimizers",
     ),
 ]
+
+
+@pytest.fixture
+def mock_aioresponse() -> Generator[aioresponses, None, None]:
+    """Fixture for aioresponses."""
+    with aioresponses() as m:
+        yield m
+
+
+def simulated_device(**kwargs: object) -> SimulatedDevice:
+    """Simulate the first device of the test data."""
+    values, params, _ = SMA_TESTDATA[0].values
+    return SimulatedDevice.from_replies(values, params, **kwargs)  # type: ignore[arg-type]
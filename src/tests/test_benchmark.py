@@ -0,0 +1,38 @@
+"""Test the benchmarks, so they keep working."""
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from . import benchmark
+
+
+@pytest.mark.parametrize(
+    "func", [pytest.param(func, id=name) for name, func in benchmark.cases()]
+)
+def test_case(func: Callable[[], Any]) -> None:
+    """Ensure every case runs."""
+    func()
+
+
+async def test_read_replayed() -> None:
+    """Ensure the in-memory session replays the payloads of the device."""
+    sma = benchmark.new_sma(benchmark.DATASETS[0])
+    sensors = await sma.get_sensors()
+    assert await sma.read(sensors)
+    assert sensors["grid_power"].value == 2460
+
+
+def test_compare(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    """Ensure slower cases are reported."""
+    base = {"a": 1.0, "b": 1.0}
+    assert benchmark.compare(base, {"a": 1.1, "b": 1.3, "c": 9}, 1.2) == ["b"]
+
+    saved = tmp_path / "base.json"
+    assert benchmark.main(["-k", "l10n", "--repeat", "1", "--save", str(saved)]) == 0
+    assert "l10n" in saved.read_text()
+    saved.write_text('{"l10n": 1e-12}')
+    assert benchmark.main(["-k", "l10n", "--repeat", "1", "--compare", str(saved)]) == 1
+    assert "Slower than" in capsys.readouterr().out
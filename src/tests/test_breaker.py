@@ -0,0 +1,126 @@
+"""Test the circuit breaker."""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aioresponses import CallbackResult, aioresponses
+from yarl import URL
+
+from pysma import SmaCircuitOpenException, SmaConnectionException, SMAWebConnect
+from pysma.breaker import CircuitBreaker, CircuitState
+from pysma.retry import RetryPolicy
+
+BASE_URL = "http://1.1.1.1"
+
+
+def test_states() -> None:
+    """Test the circuit opens, half-opens and closes."""
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    assert breaker.state is CircuitState.CLOSED
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert 0 < breaker.retry_in <= 60
+    assert not breaker.acquire_probe()
+
+    breaker.cooldown = 0
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.acquire_probe()
+    # Only a single probe
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.acquire_probe()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.acquire_probe()
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.failures == 0
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.acquire_probe()
+    breaker.release_probe()
+    assert breaker.state is CircuitState.HALF_OPEN
+
+
+def test_invalid() -> None:
+    """Test an invalid threshold."""
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_threshold=0)
+
+
+async def test_fail_fast(mock_aioresponse: aioresponses) -> None:
+    """Test requests fail fast while open and a probe closes the circuit."""
+    mock_aioresponse.get(
+        f"{BASE_URL}/dummy-url",
+        exception=aiohttp.ClientConnectionError("mocked error"),
+    )
+    mock_aioresponse.get(f"{BASE_URL}/dummy-url", payload={"result": 1})
+    mock_aioresponse.post(f"{BASE_URL}/dyn/getDashValues.json", payload={})
+    probe_key = ("POST", URL(f"{BASE_URL}/dyn/getDashValues.json"))
+
+    async with aiohttp.ClientSession() as session:
+        sma = SMAWebConnect(
+            session,
+            BASE_URL,
+            "pass",
+            retry=RetryPolicy(attempts=1),
+            breaker=CircuitBreaker(failure_threshold=1),
+        )
+        with pytest.raises(SmaConnectionException):
+            await sma._get_json("/dummy-url")
+        assert sma.breaker.state is CircuitState.OPEN
+
+        with pytest.raises(SmaCircuitOpenException):
+            await sma._get_json("/dummy-url")
+        assert probe_key not in mock_aioresponse.requests
+
+        sma.breaker.cooldown = 0
+        assert await sma._get_json("/dummy-url") == {"result": 1}
+        assert sma.breaker.state is CircuitState.CLOSED
+        assert probe_key in mock_aioresponse.requests
+
+
+async def test_probe_cancelled(mock_aioresponse: aioresponses) -> None:
+    """Test a cancelled probe does not keep the circuit open."""
+
+    async def _slow(*_: object, **__: object) -> CallbackResult:
+        await asyncio.sleep(1)
+        return CallbackResult(payload={})
+
+    mock_aioresponse.post(f"{BASE_URL}/dyn/getDashValues.json", callback=_slow)
+    mock_aioresponse.post(f"{BASE_URL}/dyn/getDashValues.json", payload={})
+    mock_aioresponse.get(f"{BASE_URL}/dummy-url", payload={"result": 1})
+    async with aiohttp.ClientSession() as session:
+        sma = SMAWebConnect(
+            session, BASE_URL, "pass", breaker=CircuitBreaker(cooldown=0)
+        )
+        sma.breaker.failures = 5
+        sma.breaker.record_failure()
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(sma._get_json("/dummy-url"), 0.05)
+        assert sma.breaker.state is CircuitState.HALF_OPEN
+
+        assert await sma._get_json("/dummy-url") == {"result": 1}
+        assert sma.breaker.state is CircuitState.CLOSED
+
+
+async def test_probe_fails(mock_aioresponse: aioresponses) -> None:
+    """Test a failed probe opens the circuit again."""
+    mock_aioresponse.post(
+        f"{BASE_URL}/dyn/getDashValues.json",
+        exception=aiohttp.ClientConnectionError("mocked error"),
+    )
+    async with aiohttp.ClientSession() as session:
+        sma = SMAWebConnect(
+            session, BASE_URL, "pass", breaker=CircuitBreaker(cooldown=0)
+        )
+        sma.breaker.failures = 5
+        sma.breaker.record_failure()
+        with pytest.raises(SmaCircuitOpenException):
+            await sma._get_json("/dummy-url")
+        assert sma.breaker.failures == 7
@@ -0,0 +1,102 @@
+"""Test the tuned connections."""
+
+import asyncio
+import ssl
+from unittest.mock import patch
+
+import pytest
+from aiohttp import TCPConnector
+
+from pysma import DeviceConfig, SMAFleet, SMAWebConnect
+from pysma.connection import (
+    create_connector,
+    create_session,
+    keepalive_timeout,
+    ssl_context,
+)
+from pysma.const import DEFAULT_KEEPALIVE_TIMEOUT, DEFAULT_MAX_CONCURRENT_REQUESTS
+from pysma.definitions.webconnect import grid_power
+from pysma.retry import RetryPolicy
+from pysma.sensor import Sensors
+from pysma.simulator import Simulator
+
+from .conftest import simulated_device
+
+
+def test_ssl_context() -> None:
+    """Test certificates are only verified if requested."""
+    assert ssl_context().verify_mode == ssl.CERT_NONE
+    assert not ssl_context().check_hostname
+    assert ssl_context(verify=True).verify_mode == ssl.CERT_REQUIRED
+
+
+async def test_create_session() -> None:
+    """Test the session owns a tuned connector."""
+    connector = create_connector()
+    assert connector.limit_per_host == DEFAULT_MAX_CONCURRENT_REQUESTS
+    await connector.close()
+
+    async with create_session() as session:
+        assert isinstance(session.connector, type(connector))
+        assert session.connector.limit_per_host == DEFAULT_MAX_CONCURRENT_REQUESTS
+
+
+async def test_warm_up() -> None:
+    """Test the warmed up connection is used by the next request."""
+    async with Simulator([simulated_device()]) as sim, create_session() as session:
+        sma = SMAWebConnect(session, sim.urls[0], "pass")
+        assert await sma.warm_up()
+        await sma.device_info()
+        await sma.close_session()
+        assert sim.devices[0].requests["/"] == 1
+        assert len(sim.devices[0].connections) == 1
+
+        offline = SMAWebConnect(
+            session, "http://127.0.0.1:1", retry=RetryPolicy(timeout=1)
+        )
+        assert not await offline.warm_up()
+
+
+async def test_fleet_warm_up() -> None:
+    """Test the fleet warms up the connection before every poll."""
+    async with Simulator([simulated_device()]) as sim:
+        config = DeviceConfig(
+            sim.urls[0],
+            "pass",
+            interval=0.1,
+            warm_up=0.05,
+            sensors=Sensors(grid_power),
+        )
+        async with SMAFleet([config]):
+            await asyncio.sleep(0.25)
+        requests = sim.devices[0].requests
+        assert requests["/"] >= 1
+        assert requests["/dyn/getValues.json"] > requests["/"]
+
+
+async def test_fleet_verify_ssl() -> None:
+    """Test the fleet passes verify_ssl to the connector of its session."""
+    with patch("pysma.fleet.create_connector", wraps=create_connector) as mock:
+        fleet = SMAFleet([], verify_ssl=True)
+        fleet._setup()
+        mock.assert_called_once_with(verify_ssl=True)
+        await fleet.stop()
+
+
+async def test_warm_up_keepalive() -> None:
+    """Test a warm up the connector would not keep alive is refused."""
+    assert keepalive_timeout(None) is None
+    config = DeviceConfig("1.1.1.1", warm_up=DEFAULT_KEEPALIVE_TIMEOUT)
+    fleet = SMAFleet([config])
+    with pytest.raises(ValueError):
+        fleet._setup()
+    await fleet.stop()
+
+    # The keep-alive of a session passed to the fleet
+    async with create_session(create_connector(keepalive_timeout=30)) as session:
+        assert keepalive_timeout(session.connector) == 30
+        SMAFleet([config], session)._setup()
+    async with create_session(TCPConnector(force_close=True)) as session:
+        assert keepalive_timeout(session.connector) == 0
+        with pytest.raises(ValueError):
+            SMAFleet([DeviceConfig("1.1.1.1", warm_up=1)], session)._setup()
@@ -0,0 +1,91 @@
+"""Test the dashboard reader."""
+
+from unittest.mock import MagicMock, patch
+
+import aiohttp
+from aioresponses import aioresponses
+from yarl import URL
+
+from pysma import DashboardReader, SMAWebConnect
+from pysma.definitions.webconnect import (
+    current_total,
+    daily_yield,
+    device_type,
+    grid_power,
+    total_yield,
+)
+from pysma.sensor import Sensors
+
+BASE_URL = "http://1.1.1.1"
+
+
+def dash_values(power: int | None) -> dict:
+    """Reply to getDashValues."""
+    return {
+        "result": {
+            "0199-xxxxx385": {
+                "6100_40263F00": {"1": [{"val": power}]},
+                "6400_00260100": {"1": [{"val": 3514000}]},
+                "6800_08822000": {"1": [{"val": [{"tag": 9402}]}]},
+            }
+        }
+    }
+
+
+@patch("pysma.dashboard._LOG.debug")
+async def test_read(mock_debug: MagicMock, mock_aioresponse: aioresponses) -> None:
+    """Test the dashboard is read without login."""
+    no_power = dash_values(1000)
+    del no_power["result"]["0199-xxxxx385"]["6100_40263F00"]
+    for payload in (dash_values(1000), dash_values(None), no_power):
+        mock_aioresponse.post(f"{BASE_URL}/dyn/getDashValues.json", payload=payload)
+    sensors = Sensors([grid_power, total_yield, daily_yield, device_type])
+    sensors.add(current_total)
+    sensors["current_total"].enabled = False
+    async with aiohttp.ClientSession() as session:
+        sma = SMAWebConnect(session, BASE_URL, "pass")
+        reader = DashboardReader(sma, sensors)
+        assert reader.resolved is None
+
+        assert await reader.read()
+        assert sensors["grid_power"].value == 1000
+        assert sensors["total_yield"].value == 3514
+        assert sensors["device_type"].value == "Sunny Boy 3.6"
+        assert sensors["daily_yield"].value is None
+        assert reader.resolved is not None
+        assert [sen.name for sen in reader.resolved] == [
+            "grid_power",
+            "total_yield",
+            "device_type",
+        ]
+        assert mock_debug.call_count == 1
+
+        # Unlike read, a missing power is 0
+        assert await reader.read()
+        assert sensors["grid_power"].value == 0
+        assert mock_debug.call_count == 1
+
+        # As read, a missing key leaves the value unchanged
+        sensors["grid_power"].value = 5
+        assert await reader.read()
+        assert sensors["grid_power"].value == 5
+
+    assert ("POST", URL(f"{BASE_URL}/dyn/login.json")) not in mock_aioresponse.requests
+
+
+async def test_reset(mock_aioresponse: aioresponses) -> None:
+    """Test sensors are resolved again after reset."""
+    mock_aioresponse.post(
+        f"{BASE_URL}/dyn/getDashValues.json", payload=dash_values(1000), repeat=True
+    )
+    sensors = Sensors([grid_power])
+    async with aiohttp.ClientSession() as session:
+        reader = DashboardReader(SMAWebConnect(session, BASE_URL), sensors)
+        assert await reader.read()
+        sensors.add(total_yield)
+        assert await reader.read()
+        assert sensors["total_yield"].value is None
+
+        reader.reset()
+        assert await reader.read()
+        assert sensors["total_yield"].value == 3514
@@ -0,0 +1,162 @@
+"""Test the fleet poller."""
+
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from aioresponses import aioresponses
+from yarl import URL
+
+from pysma import (
+    DeviceConfig,
+    JsonSessionStore,
+    PollResult,
+    SmaConnectionException,
+    SmaException,
+    SMAFleet,
+)
+from pysma.definitions.webconnect import grid_power
+from pysma.retry import RetryPolicy
+from pysma.sensor import Sensors
+
+GOOD = "http://1.1.1.1"
+BAD = "http://2.2.2.2"
+FLAKY = "http://3.3.3.3"
+
+
+@pytest.fixture
+def mock_aioresponse(mock_aioresponse: aioresponses) -> aioresponses:
+    """Add the replies of a good and an offline device."""
+    mock_aioresponse.post(
+        f"{GOOD}/dyn/login.json", payload={"result": {"sid": "ABCD"}}, repeat=True
+    )
+    mock_aioresponse.post(f"{GOOD}/dyn/logout.json?sid=ABCD", payload={}, repeat=True)
+    mock_aioresponse.post(
+        f"{GOOD}/dyn/getValues.json?sid=ABCD",
+        payload={"result": {"0199-xxxxx385": {"6100_40263F00": {"val": 1234}}}},
+        repeat=True,
+    )
+    mock_aioresponse.post(
+        f"{BAD}/dyn/login.json",
+        exception=aiohttp.ClientConnectionError("mocked error"),
+        repeat=True,
+    )
+    return mock_aioresponse
+
+
+def _configs(interval: float = 10) -> list[DeviceConfig]:
+    return [
+        DeviceConfig(
+            url,
+            "pass",
+            interval=interval,
+            sensors=Sensors(grid_power),
+            retry=RetryPolicy(delay=0),
+        )
+        for url in (GOOD, BAD)
+    ]
+
+
+async def test_poll_once(mock_aioresponse: aioresponses) -> None:
+    """Test a failing device does not stop the others."""
+    async with aiohttp.ClientSession() as session:
+        fleet = SMAFleet(_configs(), session, max_concurrency=1)
+        good, bad = await fleet.poll_once()
+
+    assert good.ok
+    assert good.device.sensors
+    assert good.device.sensors["grid_power"].value == 1234
+    assert not bad.ok
+    assert isinstance(bad.error, SmaConnectionException)
+    assert bad.device.sma._sid is None
+    assert len(mock_aioresponse.requests[("POST", URL(f"{BAD}/dyn/login.json"))]) == 3
+
+
+async def test_connection_error_no_logout(
+    mock_aioresponse: aioresponses, tmp_path: Path
+) -> None:
+    """Test the session is dropped without a logout after a connection error."""
+    mock_aioresponse.post(
+        f"{FLAKY}/dyn/login.json", payload={"result": {"sid": "ABCD"}}
+    )
+    mock_aioresponse.post(
+        f"{FLAKY}/dyn/getValues.json?sid=ABCD",
+        exception=aiohttp.ClientConnectionError("mocked error"),
+        repeat=True,
+    )
+    config = DeviceConfig(
+        FLAKY, "pass", sensors=Sensors(grid_power), retry=RetryPolicy(delay=0)
+    )
+    store = JsonSessionStore(tmp_path / "sessions.json")
+    async with aiohttp.ClientSession() as session:
+        fleet = SMAFleet([config], session, session_store=store)
+        (res,) = await fleet.poll_once()
+
+    assert isinstance(res.error, SmaConnectionException)
+    assert res.device.sma._sid is None
+    assert ("POST", URL(f"{FLAKY}/dyn/logout.json?sid=ABCD")) not in (
+        mock_aioresponse.requests
+    )
+    # The lease on the shared session was released
+    assert store.file.get(res.device.sma._session_key) is None
+
+
+async def test_unexpected_error(mock_aioresponse: aioresponses) -> None:
+    """Test an unexpected error of a device does not lose the other results."""
+    async with aiohttp.ClientSession() as session:
+        fleet = SMAFleet(_configs(), session)
+        fleet._setup()
+        with patch.object(
+            fleet.devices[1].sma, "read", side_effect=RuntimeError("bug")
+        ):
+            good, bad = await fleet.poll_once()
+
+    assert good.ok
+    assert isinstance(bad.error, SmaException)
+    assert isinstance(bad.error.__cause__, RuntimeError)
+
+
+async def test_callback(mock_aioresponse: aioresponses) -> None:
+    """Test results are delivered to the callback until stopped."""
+    results: list[PollResult] = []
+    configs = _configs(0.01)
+    for config in configs:
+        config.retry = None
+    fleet = SMAFleet(configs, on_result=results.append)
+    async with fleet:
+        assert fleet.session is not None
+        await asyncio.sleep(0.1)
+        with pytest.raises(RuntimeError):
+            async for _ in fleet:
+                pass
+
+    assert fleet.session is None
+    urls = [res.device.config.url for res in results]
+    assert urls.count(GOOD) > 1
+    assert urls.count(BAD) > 1
+    # The interval is the retry budget, a poll is not retried beyond it
+    assert len(
+        mock_aioresponse.requests[("POST", URL(f"{BAD}/dyn/login.json"))]
+    ) < 3 * urls.count(BAD)
+
+
+async def test_iterate(mock_aioresponse: aioresponses) -> None:
+    """Test results can be iterated."""
+    async with aiohttp.ClientSession() as session:
+        seen = set()
+        async with SMAFleet(_configs(), session) as fleet:
+            async for res in fleet:
+                seen.add(res.device.config.url)
+                if len(seen) == 2:
+                    break
+        assert fleet.session is session
+        assert not session.closed
+    assert seen == {GOOD, BAD}
+
+
+def test_invalid_concurrency() -> None:
+    """Test max_concurrency is validated."""
+    with pytest.raises(ValueError):
+        SMAFleet([], max_concurrency=0)
@@ -1,8 +1,24 @@
 """Test pysma helpers file."""
 
+import json
+import multiprocessing
+import sys
 from dataclasses import asdict
+from pathlib import Path
 
-from pysma.helpers import DeviceInfo, ensure_string, version_int_to_string
+import pytest
+
+from pysma import helpers
+from pysma.helpers import (
+    JSON_DECODERS,
+    DeviceInfo,
+    JsonFile,
+    _raw_reply_decoder,
+    ensure_string,
+    json_decoder,
+    values_decoder,
+    version_int_to_string,
+)
 
 
 def test_version_int_to_string() -> None:
@@ -40,3 +56,80 @@ def test_devtype() -> None:
         "manufacturer": "SMA",
         "sw_version": "1",
     }
+
+
+@pytest.mark.parametrize("name", JSON_DECODERS)
+def test_json_decoder(name: str) -> None:
+    """Ensure every installed decoder decodes bytes and raises ValueError."""
+    try:
+        loads = json_decoder(name)
+    except ImportError:
+        pytest.skip(f"{name} not installed")
+    assert loads(b'{"result": {"sid": "ABCD"}, "val": [1, 2.5, null]}') == {
+        "result": {"sid": "ABCD"},
+        "val": [1, 2.5, None],
+    }
+    with pytest.raises(ValueError):
+        loads(b"THIS IS NOT A VALID JSON")
+
+
+def test_json_decoder_fallback(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Ensure the stdlib decoder is used if no other is installed."""
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    monkeypatch.setitem(sys.modules, "msgspec", None)
+    assert json_decoder() is json.loads
+    with pytest.raises(ImportError):
+        json_decoder("orjson")
+    with pytest.raises(ValueError):
+        json_decoder("yaml")
+
+
+@pytest.mark.parametrize("msgspec", [True, False])
+def test_values_decoder(msgspec: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Ensure only the requested keys are kept."""
+    if msgspec:
+        pytest.importorskip("msgspec")
+    else:
+        monkeypatch.setitem(sys.modules, "msgspec", None)
+        _raw_reply_decoder.cache_clear()
+    loads = values_decoder(["6100_40263F00", "6400_00260100"])
+    body = b"""{"result": {"0199-xxxxx385": {
+        "6100_40263F00": {"1": [{"val": 2460}]},
+        "6100_00411E00": {"1": [{"val": 3680}]},
+        "6400_00260100": {"val": 3514000}
+    }}}"""
+    assert loads(body) == {
+        "result": {
+            "0199-xxxxx385": {
+                "6100_40263F00": {"1": [{"val": 2460}]},
+                "6400_00260100": {"val": 3514000},
+            }
+        }
+    }
+    assert loads(b'{"err": 401}') == {"err": 401}
+    assert loads(b'{"result": {"sid": null}}') == {"result": {"sid": None}}
+    with pytest.raises(ValueError):
+        loads(b"THIS IS NOT A VALID JSON")
+    _raw_reply_decoder.cache_clear()
+
+
+def _set_keys(path: Path, prefix: str) -> None:
+    file = JsonFile(path)
+    for idx in range(20):
+        file.set(f"{prefix}{idx}", idx)
+
+
+@pytest.mark.skipif(helpers.fcntl is None, reason="fcntl not available")
+def test_json_file_processes(tmp_path: Path) -> None:
+    """Test processes sharing a file keep each other's updates."""
+    path = tmp_path / "store.json"
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_set_keys, args=(path, f"p{n}_")) for n in range(4)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    assert [proc.exitcode for proc in procs] == [0] * 4
+    assert len(json.loads(path.read_text())) == 80
+    assert JsonFile(path).get("p3_19") == 19
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,72 @@
+"""Test pysma sensor layouts."""
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pysma.const import GENERIC_SENSORS, JMESPATHS_TAG
+from pysma.definitions.webconnect import optimizer_power, sensor_map
+from pysma.helpers import DeviceInfo
+from pysma.layout import JsonLayoutStore, dump_layout, layout_key, load_layout
+from pysma.sensor import Sensors
+
+
+def test_round_trip() -> None:
+    """Test a layout is restored with the same sensors."""
+    sensors = Sensors(sensor_map[GENERIC_SENSORS])
+    optimizer = Sensors(optimizer_power)["optimizer_power"]
+    optimizer.key_idx = 3
+    optimizer.name = "optimizer_power_3"
+    sensors.add(optimizer)
+    sensors["grid_power"].deadband = 10
+    sensors["frequency"].deadband_rel = 0.01
+    sensors["frequency"].publish_interval = 60
+
+    restored = load_layout(dump_layout(sensors))
+    assert list(restored) == list(sensors)
+    assert restored["grid_power"].deadband == 10
+    assert restored["frequency"].deadband_rel == 0.01
+    assert restored["frequency"].publish_interval == 60
+    assert restored["status"].path == JMESPATHS_TAG
+    assert restored["optimizer_power_3"].key_idx == 3
+    assert restored["pv_power_b"].key_idx == 1
+
+
+def test_without_settings() -> None:
+    """Test layouts stored without the reporting settings are restored."""
+    layout = dump_layout(Sensors(sensor_map[GENERIC_SENSORS]))
+    for item in layout:
+        del item["deadband"], item["deadband_rel"], item["publish_interval"]
+    restored = load_layout(layout)
+    assert restored["grid_power"].deadband is None
+
+
+def test_invalid() -> None:
+    """Test an invalid layout raises ValueError."""
+    with pytest.raises(ValueError):
+        load_layout([{"key": "6100_40263F00"}])
+
+
+def test_layout_key() -> None:
+    """Test layouts are only keyed on known serials."""
+    assert layout_key(DeviceInfo(serial="123", sw_version="1.2")) == "123_1.2"
+    assert layout_key(DeviceInfo()) is None
+
+
+@patch("pysma.helpers._LOG.warning")
+def test_json_store(mock_warn: MagicMock, tmp_path: Path) -> None:
+    """Test the json layout store."""
+    store = JsonLayoutStore(tmp_path / "layouts.json")
+    assert store.load("123_1.2") is None
+
+    layout = dump_layout(Sensors(sensor_map[GENERIC_SENSORS]))
+    store.save("123_1.2", layout)
+    store.save("456_1.2", [])
+    assert JsonLayoutStore(tmp_path / "layouts.json").load("123_1.2") == layout
+    assert store.load("456_1.2") == []
+    assert mock_warn.call_count == 0
+
+    store.file.path.write_text("NOT JSON")
+    assert store.load("123_1.2") is None
+    assert mock_warn.call_count == 1
@@ -0,0 +1,82 @@
+"""Test the adaptive request limiter."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from pysma.limiter import AdaptiveLimiter
+
+
+async def test_increase() -> None:
+    """Test successful requests increase the limit up to max_limit."""
+    limiter = AdaptiveLimiter(max_limit=3)
+    assert limiter.limit == 1
+    for _ in range(10):
+        async with limiter.acquire():
+            assert limiter.in_flight == 1
+    assert limiter.in_flight == 0
+    assert limiter.limit == 3
+
+
+async def test_decrease() -> None:
+    """Test failed and slow requests decrease the limit."""
+    limiter = AdaptiveLimiter(max_limit=8, initial_limit=8, latency_target=0.01)
+    with pytest.raises(TimeoutError):
+        async with limiter.acquire():
+            raise TimeoutError
+    assert limiter.limit == 4
+
+    async with limiter.acquire():
+        await asyncio.sleep(0.02)
+    assert limiter.limit == 2
+
+    with pytest.raises(asyncio.CancelledError):
+        async with limiter.acquire():
+            raise asyncio.CancelledError
+    assert limiter.limit == 2
+
+
+async def test_limit() -> None:
+    """Test no more than limit requests are in flight."""
+    limiter = AdaptiveLimiter(max_limit=2, initial_limit=2)
+    peak = 0
+
+    async def _request() -> None:
+        nonlocal peak
+        async with limiter.acquire():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(_request() for _ in range(10)))
+    assert peak == 2
+    assert limiter.in_flight == 0
+
+
+async def test_cancel_waiter() -> None:
+    """Test a cancelled waiter passes on its slot."""
+    limiter = AdaptiveLimiter(max_limit=1)
+    order = []
+
+    async def _request(name: str) -> None:
+        async with limiter.acquire():
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    first = asyncio.create_task(_request("first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(_request("second"))
+    third = asyncio.create_task(_request("third"))
+    await asyncio.sleep(0)
+    with patch.object(limiter, "_update"):
+        second.cancel()
+        await asyncio.gather(first, third, return_exceptions=True)
+    assert order == ["first", "third"]
+
+
+def test_invalid() -> None:
+    """Test invalid arguments."""
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(max_limit=0)
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(backoff=1)
@@ -0,0 +1,80 @@
+"""Test the incremental logger sync."""
+
+import json
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+from pysma import SMAWebConnect
+from pysma.logger_sync import JsonHighWaterStore, LoggerSync
+
+BASE_URL = "http://1.1.1.1"
+
+
+@pytest.fixture
+def device_log() -> list[dict]:
+    """Entries stored on the device, every 300 seconds."""
+    return [{"t": t, "v": t // 300} for t in range(0, 300_000, 300)]
+
+
+@pytest.fixture
+def requests(device_log: list[dict]) -> Generator[list[tuple[int, int]], None, None]:
+    """Mock the logger of a device, yields the requested ranges."""
+    ranges = []
+
+    def _logger(url: str, **kwargs: Any) -> CallbackResult:
+        payload = json.loads(kwargs["data"])
+        ranges.append((payload["tStart"], payload["tEnd"]))
+        entries = [
+            entry
+            for entry in device_log
+            if payload["tStart"] <= entry["t"] <= payload["tEnd"]
+        ]
+        return CallbackResult(payload={"result": {"0199-xxxxx385": entries}})
+
+    with aioresponses() as m:
+        m.post(f"{BASE_URL}/dyn/login.json", payload={"result": {"sid": "ABCD"}})
+        m.post(f"{BASE_URL}/dyn/getLogger.json?sid=ABCD", callback=_logger, repeat=True)
+        yield ranges
+
+
+async def test_sync(requests: list[tuple[int, int]], tmp_path: Path) -> None:
+    """Test only new entries are read."""
+    store = JsonHighWaterStore(tmp_path / "hwm.json")
+    async with aiohttp.ClientSession() as session:
+        sma = SMAWebConnect(session, BASE_URL, "pass")
+        sync = LoggerSync(sma, store, serial="123", lookback=3000)
+
+        entries = await sync.sync(28672, now=30_000)
+        assert [entry["t"] for entry in entries] == list(range(27_000, 30_001, 300))
+        assert store.get("123", 28672) == 30_000
+        assert store.get("123", 28704) is None
+
+        # Nothing new
+        assert await sync.sync(28672, now=30_100) == []
+
+        # A gap is read in windows
+        requests.clear()
+        entries = await sync.sync(28672, now=30_000 + 86400 * 2)
+        assert entries[0]["t"] == 30_300
+        assert len(entries) == 86400 * 2 // 300
+        assert len(requests) == 2
+
+        # A stored timestamp in the future is discarded
+        store.set("123", 28672, 200_000)
+        entries = await sync.sync(28672, now=60_000)
+        assert entries[0]["t"] == 57_000
+        assert store.get("123", 28672) == 60_000
+
+
+def test_store(tmp_path: Path) -> None:
+    """Test the json store."""
+    store = JsonHighWaterStore(tmp_path / "hwm.json")
+    store.set("123", 28672, 1000)
+    assert JsonHighWaterStore(tmp_path / "hwm.json").get("123", 28672) == 1000
+    store.file.set("123_28704", "not a timestamp")
+    assert store.get("123", 28704) is None
@@ -0,0 +1,103 @@
+"""Test the request metrics."""
+
+import aiohttp
+import pytest
+
+from pysma import Metrics, SmaConnectionException, SMAWebConnect
+from pysma.retry import RetryPolicy
+from pysma.simulator import Simulator
+
+from .conftest import simulated_device
+
+
+def test_metrics() -> None:
+    """Test counters and histogram."""
+    metrics = Metrics(buckets=(1, 0.1))
+    metrics.on_request("/dyn/getValues.json", 0.05, 100, 0.001)
+    metrics.on_request("/dyn/getValues.json", 0.1, 200, 0.002)
+    metrics.on_request("/dyn/getValues.json", 3, 300, 0.003)
+    metrics.on_retry("/dyn/getValues.json")
+    metrics.on_error("/dyn/login.json", "503")
+    metrics.on_login()
+
+    snap = metrics.snapshot()
+    assert snap["logins"] == 1
+    values = snap["endpoints"]["/dyn/getValues.json"]
+    assert values["requests"] == 3
+    assert values["retries"] == 1
+    assert values["bytes"] == 600
+    assert values["seconds"] == pytest.approx(3.15)
+    assert values["decode_seconds"] == pytest.approx(0.006)
+    assert values["buckets"] == {"0.1": 2, "1": 2, "+Inf": 3}
+    assert values["errors"] == {}
+    assert snap["endpoints"]["/dyn/login.json"]["errors"] == {"503": 1}
+
+    metrics.reset()
+    assert metrics.snapshot() == {"logins": 0, "endpoints": {}}
+
+
+def test_prometheus() -> None:
+    """Test the Prometheus text format."""
+    metrics = Metrics(buckets=(0.1,))
+    assert "pysma_logins_total 0\n" in metrics.prometheus()
+
+    metrics.on_request("/dyn/getValues.json", 0.05, 100, 0.001)
+    metrics.on_error("/dyn/getValues.json", "401")
+    text = metrics.prometheus(labels={"device": 'inverter "1"'})
+    lines = text.splitlines()
+    assert 'pysma_logins_total{device="inverter \\"1\\""} 0' in lines
+    ep = 'device="inverter \\"1\\"",endpoint="/dyn/getValues.json"'
+    assert f"pysma_requests_total{{{ep}}} 1" in lines
+    assert f"pysma_bytes_total{{{ep}}} 100" in lines
+    assert f'pysma_errors_total{{{ep},code="401"}} 1' in lines
+    assert f'pysma_request_seconds_bucket{{{ep},le="0.1"}} 1' in lines
+    assert f'pysma_request_seconds_bucket{{{ep},le="+Inf"}} 1' in lines
+    assert f"pysma_request_seconds_count{{{ep}}} 1" in lines
+    assert "# TYPE pysma_request_seconds histogram" in lines
+
+
+async def test_requests() -> None:
+    """Test SMAWebConnect reports its requests."""
+    devices = [simulated_device(), simulated_device(disconnect_rate=1)]
+    metrics = Metrics()
+    async with Simulator(devices) as sim, aiohttp.ClientSession() as session:
+        sma = SMAWebConnect(session, sim.urls[0], "pass", metrics=metrics)
+        await sma.device_info()
+        snap = metrics.snapshot()
+        assert snap["logins"] == 1
+        assert snap["endpoints"]["/dyn/getValues.json"]["requests"] == 1
+        assert snap["endpoints"]["/dyn/getValues.json"]["bytes"] > 0
+
+        sma = SMAWebConnect(
+            session,
+            sim.urls[1],
+            "pass",
+            metrics=metrics,
+            retry=RetryPolicy(attempts=2, delay=0),
+        )
+        with pytest.raises(SmaConnectionException):
+            await sma.device_info()
+        login = metrics.snapshot()["endpoints"]["/dyn/login.json"]
+        assert login["retries"] == 1
+        assert login["errors"] == {"connection": 1}
+
+
+async def test_instrumentation_error() -> None:
+    """Test errors of the instrumentation are not taken for invalid replies."""
+
+    class _Failing(Metrics):
+        def on_request(
+            self, endpoint: str, seconds: float, size: int, decode_seconds: float
+        ) -> None:
+            raise ValueError("broken metrics")
+
+    metrics = _Failing()
+    async with (
+        Simulator([simulated_device()]) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        sma = SMAWebConnect(session, sim.urls[0], "pass", metrics=metrics)
+        with pytest.raises(ValueError, match="broken metrics"):
+            await sma.device_info()
+        assert not metrics.snapshot()["endpoints"]
+        assert sma.limiter.limit > sma.limiter.min_limit
@@ -0,0 +1,60 @@
+"""Test the sensor recorder."""
+
+import math
+
+import pytest
+
+from pysma.recorder import SensorRecorder
+from pysma.sensor import Sensor, Sensors
+
+
+@pytest.fixture
+def sensors() -> Sensors:
+    """Sensors to record."""
+    return Sensors(
+        [
+            Sensor("6100_40263F00", "grid_power", unit="W"),
+            Sensor("6180_08214800", "status"),
+        ]
+    )
+
+
+def test_record(sensors: Sensors) -> None:
+    """Test values are recorded in a ring buffer."""
+    rec = SensorRecorder(sensors, capacity=3)
+    assert sensors.recorder is rec
+    assert rec.names == ["grid_power", "status"]
+    assert len(rec) == 0
+    assert rec.mean("grid_power") is None
+
+    for tstamp, power in enumerate([100, 200, None, 400, 500]):
+        sensors["grid_power"].value = power
+        sensors["status"].value = "Ok"
+        rec.record(timestamp=tstamp * 10)
+
+    assert len(rec) == 3
+    assert list(rec.timestamps()) == [20, 30, 40]
+    values = rec.column("grid_power")
+    assert math.isnan(values[0])
+    assert list(values[1:]) == [400, 500]
+    assert all(math.isnan(val) for val in rec.column("status"))
+    assert rec.mean("grid_power") == 450
+    assert rec.min("grid_power") == 400
+    assert rec.max("grid_power") == 500
+    assert rec.min("status") is None
+    # Interval 20-30 is skipped, 30-40: (400 + 500) / 2 * 10
+    assert rec.integrate("grid_power") == 4500
+
+    with pytest.raises(KeyError):
+        rec.column("unknown")
+
+    rec.clear()
+    assert len(rec) == 0
+    assert len(rec.timestamps()) == 0
+
+
+def test_invalid(sensors: Sensors) -> None:
+    """Test an invalid capacity."""
+    with pytest.raises(ValueError):
+        SensorRecorder(sensors, capacity=0)
+    assert sensors.recorder is None
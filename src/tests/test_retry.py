@@ -0,0 +1,109 @@
+"""Test the retry policy."""
+
+import time
+
+import aiohttp
+import pytest
+from aioresponses import aioresponses
+
+from pysma import SmaConnectionException, SMAWebConnect
+from pysma.exceptions import SmaReadException
+from pysma.retry import RetryPolicy, remaining_budget, request_budget
+
+
+def test_delay() -> None:
+    """Test the delay grows exponentially up to max_delay."""
+    policy = RetryPolicy(attempts=6, delay=1, max_delay=5, jitter=0)
+    exc = TimeoutError()
+    assert [policy.retry_delay(n, exc, None) for n in range(6)] == [
+        1,
+        2,
+        4,
+        5,
+        5,
+        None,
+    ]
+
+
+def test_jitter() -> None:
+    """Test the jitter reduces the delay by up to the jitter fraction."""
+    policy = RetryPolicy(delay=1, jitter=0.5)
+    delays = {policy.retry_delay(0, TimeoutError(), None) for _ in range(50)}
+    assert all(delay is not None and 0.5 <= delay <= 1 for delay in delays)
+    assert len(delays) > 1
+
+
+def test_retry_on() -> None:
+    """Test only the configured exceptions are retried."""
+    policy = RetryPolicy()
+    assert policy.retry_delay(0, aiohttp.ServerDisconnectedError(), None)
+    assert policy.retry_delay(0, SmaReadException(), None) is None
+    policy = RetryPolicy(retry_on=(TimeoutError,))
+    assert policy.retry_delay(0, aiohttp.ServerDisconnectedError(), None) is None
+
+
+async def test_retry_on_added(mock_aioresponse: aioresponses) -> None:
+    """Test exceptions added to retry_on are retried by requests."""
+    for _ in range(2):
+        mock_aioresponse.get(
+            "http://1.1.1.1/dummy-url", exception=ConnectionResetError("reset")
+        )
+    mock_aioresponse.get("http://1.1.1.1/dummy-url", payload={"result": 1})
+    async with aiohttp.ClientSession() as session:
+        sma = SMAWebConnect(session, "1.1.1.1", retry=RetryPolicy(attempts=2, delay=0))
+        with pytest.raises(ConnectionResetError):
+            await sma._get_json("/dummy-url")
+
+        policy = RetryPolicy(
+            attempts=2,
+            delay=0,
+            retry_on=(*RetryPolicy().retry_on, ConnectionResetError),
+        )
+        sma = SMAWebConnect(session, "1.1.1.1", retry=policy)
+        assert await sma._get_json("/dummy-url") == {"result": 1}
+
+        mock_aioresponse.get(
+            "http://1.1.1.1/dummy-url",
+            exception=ConnectionResetError("reset"),
+            repeat=True,
+        )
+        with pytest.raises(SmaConnectionException):
+            await sma._get_json("/dummy-url")
+
+
+def test_deadline() -> None:
+    """Test no retries are started past the deadline."""
+    policy = RetryPolicy(timeout=5, delay=1, jitter=0, deadline=1.5)
+    end = policy.start()
+    assert end is not None
+    assert policy.attempt_timeout(0, end) == 1.5
+    assert policy.retry_delay(0, TimeoutError(), end) == 1
+    assert policy.retry_delay(1, TimeoutError(), end) is None
+    assert 0 < policy.attempt_timeout(1, end) <= 1.5
+
+
+def test_budget() -> None:
+    """Test the request budget limits retries."""
+    policy = RetryPolicy(delay=0.1, jitter=0)
+    assert remaining_budget() is None
+    with request_budget(10):
+        with request_budget(0):
+            budget = remaining_budget()
+            assert budget is not None
+            assert budget <= 0
+            end = policy.start()
+            assert end is not None
+            assert end <= time.monotonic()
+            # The first attempt is still made with the full timeout
+            assert policy.attempt_timeout(0, end) == policy.timeout
+            assert policy.retry_delay(0, TimeoutError(), end) is None
+        assert policy.retry_delay(0, TimeoutError(), policy.start()) == 0.1
+    assert policy.start() is None
+
+
+def test_invalid() -> None:
+    """Test invalid policies."""
+    with pytest.raises(ValueError):
+        RetryPolicy(attempts=0)
+    with pytest.raises(ValueError):
+        RetryPolicy(jitter=2)
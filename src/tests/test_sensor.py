@@ -5,16 +5,19 @@ from collections.abc import Callable, Generator
 from json import loads
 from unittest.mock import MagicMock, patch
 
+import jmespath
 import pytest
 
 from pysma.const import (
     GENERIC_SENSORS,
     JMESPATH_VAL,
     JMESPATH_VAL_IDX,
+    JMESPATH_VAL_IDX_TAG,
     JMESPATH_VAL_STR,
+    JMESPATH_VAL_TAG,
 )
 from pysma.definitions.webconnect import sensor_map
-from pysma.sensor import Sensor, Sensors
+from pysma.sensor import Sensor, Sensors, compile_path
 
 _LOG = logging.getLogger(__name__)
 
@@ -105,6 +108,124 @@ class Test_sensor_class:
         sens = Sensor("6100_40263F00", "s_null", "kWh")
         assert sens.extract_value({"6100_40263F00": None}) is False
 
+    def test_pop_change(self) -> None:
+        """Test changes are relative to the reported value."""
+        sens = Sensor("6100_40263F00", "grid_power", "W")
+        assert sens.pop_change() is None
+        sens.value = 100
+        change = sens.pop_change(deadband=10)
+        assert change is not None
+        assert (change.sensor, change.old, change.new) == (sens, None, 100)
+        assert sens.pop_change() is None
+
+        # Drifting within the deadband is not reported, until it adds up
+        sens.value = 105
+        assert sens.pop_change(deadband=10) is None
+        sens.value = 110
+        change = sens.pop_change(deadband=10)
+        assert change is not None
+        assert (change.old, change.new) == (100, 110)
+
+        sens.value = "Error"
+        change = sens.pop_change(deadband=10)
+        assert change is not None
+        assert (change.old, change.new) == (110, "Error")
+
+    def test_sensor_deadband(self) -> None:
+        """Test the deadband of the sensor takes precedence."""
+        sens = Sensor("6100_40263F00", "grid_power", "W", deadband=50)
+        sens.value = 100
+        assert sens.pop_change() is not None
+        sens.value = 140
+        assert sens.pop_change(deadband=10) is None
+        sens.value = 150
+        assert sens.pop_change(deadband=100) is not None
+
+        sens = Sensor("6100_40263F00", "grid_power", "W", deadband_rel=0.1)
+        sens.value = 1000
+        assert sens.pop_change() is not None
+        sens.value = 1090
+        assert sens.pop_change() is None
+        sens.value = 900
+        assert sens.pop_change() is not None
+        sens.value = 989
+        assert sens.pop_change() is None
+
+    def test_publish_interval(self) -> None:
+        """Test changes within the deadband are reported after publish_interval."""
+        sens = Sensor("6100_40263F00", "grid_power", "W", deadband=50)
+        sens.publish_interval = 60
+        sens.value = 100
+        assert sens.pop_change(now=1000) is not None
+        sens.value = 110
+        assert sens.pop_change(now=1059) is None
+        change = sens.pop_change(now=1060)
+        assert change is not None
+        assert (change.old, change.new) == (100, 110)
+        # Unchanged values are never reported
+        assert sens.pop_change(now=2000) is None
+        # Changes beyond the deadband restart the interval
+        sens.value = 200
+        assert sens.pop_change(now=2010) is not None
+        sens.value = 210
+        assert sens.pop_change(now=2060) is None
+
+    def test_extract_value_deadband(self) -> None:
+        """Test extract_value reports changes subject to the deadband."""
+        sens = Sensor("6100_40263F00", "grid_power", "W", deadband=10)
+        assert sens.extract_value({"6100_40263F00": {"val": 100}}) is True
+        assert sens.extract_value({"6100_40263F00": {"val": 105}}) is False
+        assert sens.value == 105
+        assert sens.extract_value({"6100_40263F00": {"val": 111}}) is True
+
+    def test_plan_reused(self) -> None:
+        """Test the extraction plan is compiled once and follows path changes."""
+        sens = Sensor("6400_00262200", "s_402", "W")
+        assert sens.extract_value(SB_2_5) is True
+        plan = sens._plan
+        assert plan is compile_path(JMESPATH_VAL)
+        assert sens.extract_value(SB_2_5) is False
+        assert sens._plan is plan
+
+        sens.path = JMESPATH_VAL_IDX.format(0)
+        assert sens.extract_value(SB_1_5) is False
+        assert sens._plan is not plan
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        JMESPATH_VAL,
+        JMESPATH_VAL_TAG,
+        "result.sid",
+        *(
+            tmpl.format(idx)
+            for tmpl in (JMESPATH_VAL_STR, JMESPATH_VAL_IDX, JMESPATH_VAL_IDX_TAG)
+            for idx in (-1, 0, 1, 2)
+        ),
+    ],
+)
+def test_compile_path(path: str) -> None:
+    """Ensure compiled plans match jmespath.search."""
+    values = [
+        None,
+        1,
+        [],
+        {},
+        {"val": None},
+        {"val": [{"tag": 9402}]},
+        {"1": None},
+        {"1": [{"val": [{"tag": 461}]}, {"val": 5}]},
+        [{"str": 2, "val": None}, {"str": 2, "val": 522}],
+        {"result": {"sid": "ABCD"}},
+        *SB_1_5.values(),
+        *SB_2_5.values(),
+    ]
+    plan = compile_path(path)
+    assert compile_path(path) is plan
+    for value in values:
+        assert plan(value) == jmespath.search(path, value), value
+
 
 class Test_sensors_class:
     """Test the Sensors class."""
@@ -132,6 +253,59 @@ class Test_sensors_class:
         sen.add(Sensor("key1_1", "frequency_1", ""))
         assert mock_warn.call_count == 3
 
+    @patch("pysma.sensor._LOG.warning")
+    def test_index(self, mock_warn: MagicMock) -> None:
+        """Ensure the name and key indexes follow add, replace and remove."""
+        sen = Sensors(
+            [
+                Sensor("6380_40251E00_0", "pv_power_a", unit="W"),
+                Sensor("6380_40251E00_1", "pv_power_b", unit="W"),
+            ]
+        )
+        assert "pv_power_a" in sen
+        assert "6380_40251E00" in sen
+        assert sen["6380_40251E00"].name == "pv_power_a"
+        assert sen.get_by_key("6380_40251E00", 1) is sen["pv_power_b"]
+        assert sen.get_by_key("6380_40251E00", 2) is None
+
+        # Replace by name, the old key is no longer indexed
+        sen.add(Sensor("6100_40263F00", "pv_power_a", unit="W"))
+        assert mock_warn.call_count == 1
+        assert sen["pv_power_a"].key == "6100_40263F00"
+        assert sen.get_by_key("6380_40251E00", 0) is None
+        assert sen["6380_40251E00"].name == "pv_power_b"
+        assert [s.name for s in sen] == ["pv_power_b", "pv_power_a"]
+
+        removed = sen.remove("pv_power_b")
+        assert removed.name == "pv_power_b"
+        assert "6380_40251E00" not in sen
+        assert len(sen) == 1
+        with pytest.raises(KeyError):
+            sen["6380_40251E00"]
+        with pytest.raises(KeyError):
+            sen.remove(removed)
+
+    @patch("pysma.sensor._LOG.warning")
+    def test_index_key_idx(self, mock_warn: MagicMock) -> None:
+        """Ensure sensors sharing a key are indexed by key_idx."""
+        sen = Sensors()
+        for idx in range(100):
+            opt = Sensor("6100_0046C200", f"optimizer_power_{idx}", unit="W")
+            opt.key_idx = idx
+            sen.add(opt)
+        assert mock_warn.call_count == 0
+        assert sen.get_by_key("6100_0046C200", 42) is sen["optimizer_power_42"]
+        assert len(sen.by_key("6100_0046C200")) == 100
+
+        # A duplicate key_idx is indexed once the first sensor is removed
+        sen.add(Sensor("6100_0046C200_1", "duplicate", unit="W"))
+        assert mock_warn.call_count == 1
+        assert sen.get_by_key("6100_0046C200", 1) is sen["optimizer_power_1"]
+        sen.remove("optimizer_power_1")
+        assert sen.get_by_key("6100_0046C200", 1) is sen["duplicate"]
+        sen.remove("duplicate")
+        assert sen.get_by_key("6100_0046C200", 1) is None
+
     @patch("pysma.sensor._LOG.warning")
     def test_type_error(self, mock_warn: Callable) -> None:
         """Ensure TypeError on not isinstance."""
@@ -146,3 +320,15 @@ class Test_sensors_class:
         for sen in sens:
             sen.extract_value(SB_1_5)
         assert mock_warn.called
+
+    @pytest.mark.parametrize("body", [SB_1_5, SB_2_5])
+    def test_decode_values(self, sensors: list, body: dict) -> None:
+        """Ensure decode_values matches decoding every sensor by itself."""
+        sens = Sensors([sen for _, _, sen in sensors])
+        sens.add(Sensor("6100_00465700", "frequency", "Hz"))
+        sens.add(Sensor("6100_00000000", "disabled", "W", enabled=False))
+        notfound = sens.decode_values(body)
+        assert [sen.name for sen in notfound] == ["frequency"]
+        for value, _, sen in sensors:
+            assert sens[sen.name].value == value
+        assert sens["disabled"].value is None
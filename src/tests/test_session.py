@@ -0,0 +1,176 @@
+"""Test the shared sessions."""
+
+import time
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+
+from pysma import JsonSessionStore, SharedSession, SMAWebConnect
+from pysma.simulator import Simulator
+
+from .conftest import simulated_device
+
+
+def test_json_session_store(tmp_path: Path) -> None:
+    """Test holders share the stored session."""
+    store = JsonSessionStore(tmp_path / "sessions.json")
+    assert store.acquire("dev", "a") is None
+    store.publish("dev", "a", SharedSession("ABCD", 1000.0))
+    # A store on the same file, as used by another process
+    other = JsonSessionStore(tmp_path / "sessions.json")
+    assert other.acquire("dev", "b") == SharedSession("ABCD", 1000.0, 1000.0)
+    assert other.acquire("dev2", "b") is None
+
+    # The last use is kept, if reported by a holder of the session
+    assert other.acquire("dev", "b", used=1500.0) == SharedSession(
+        "ABCD", 1000.0, 1500.0
+    )
+    assert store.acquire("dev", "c", used=2000.0) == SharedSession(
+        "ABCD", 1000.0, 1500.0
+    )
+    assert store.release("dev", "c", "EFGH")
+    assert not store.release("dev", "c", "ABCD")
+
+    # A sid found expired is not returned
+    assert other.acquire("dev", "b", stale="ABCD") is None
+    store.publish("dev", "b", SharedSession("EFGH", 2000.0))
+    assert store.acquire("dev", "a") == SharedSession("EFGH", 2000.0, 2000.0)
+
+    # Only the last holder of a sid logs out
+    assert store.release("dev", "a", "ABCD")
+    assert not store.release("dev", "a", "EFGH")
+    assert store.release("dev", "b", "EFGH")
+    assert store.acquire("dev", "c") is None
+
+
+def test_replaced_session(tmp_path: Path) -> None:
+    """Test a replaced sid is logged out by the last holder to switch."""
+    store = JsonSessionStore(tmp_path / "sessions.json")
+    store.publish("dev", "a", SharedSession("ABCD", 1000.0))
+    for holder in "bc":
+        assert store.acquire("dev", holder) is not None
+    assert store.acquire("dev", "a", stale="ABCD") is None
+    store.publish("dev", "a", SharedSession("EFGH", 2000.0))
+
+    for holder, last in (("b", False), ("c", True)):
+        session = store.acquire("dev", holder)
+        assert session is not None and session.sid == "EFGH"
+        assert store.release("dev", holder, "ABCD") is last
+    assert store.acquire("dev", "a") is not None
+
+
+def test_lease(tmp_path: Path) -> None:
+    """Test holders that did not renew their lease are dropped."""
+    store = JsonSessionStore(tmp_path / "sessions.json", lease=60)
+    store.publish("dev", "a", SharedSession("ABCD", time.time()))
+    assert store.acquire("dev", "crashed") is not None
+
+    def _expire(value: Any) -> Any:
+        value["holders"]["crashed"]["seen"] -= 61
+        return value
+
+    store.file.update("dev", _expire)
+    assert store.release("dev", "a", "ABCD")
+    assert store.file.get("dev") is None
+
+
+async def test_shared_session(tmp_path: Path) -> None:
+    """Test clients share a single session of the device."""
+    store = JsonSessionStore(tmp_path / "sessions.json")
+    async with (
+        Simulator([simulated_device(max_sessions=1)]) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        device = sim.devices[0]
+        clients = [
+            SMAWebConnect(session, sim.urls[0], "pass", session_store=store)
+            for _ in range(3)
+        ]
+        for sma in clients:
+            assert await sma.device_info()
+        assert device.requests["/dyn/login.json"] == 1
+        assert len(device.sessions) == 1
+
+        # The session expired on the device, a single client logs in again
+        device.sessions.clear()
+        for sma in clients:
+            assert await sma.device_info()
+        assert device.requests["/dyn/login.json"] == 2
+        assert len(device.sessions) == 1
+
+        for sma in clients[:-1]:
+            await sma.close_session()
+        assert len(device.sessions) == 1
+        await clients[-1].close_session()
+        assert not device.sessions
+        assert device.requests["/dyn/logout.json"] == 1
+
+
+async def test_shared_session_expiry(tmp_path: Path) -> None:
+    """Test expired shared sessions are replaced, and the others follow."""
+    store = JsonSessionStore(tmp_path / "sessions.json")
+    async with (
+        Simulator([simulated_device()]) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        device = sim.devices[0]
+        requests = device.requests
+        first, second = (
+            SMAWebConnect(
+                session, sim.urls[0], "pass", session_store=store, session_max_age=100
+            )
+            for _ in range(2)
+        )
+        assert await first.device_info()
+        assert await second.device_info()
+        sid = first._sid
+        assert second._sid == sid
+        assert requests["/dyn/login.json"] == 1
+
+        def _idle(value: Any) -> Any:
+            value["used"] -= 1000
+            return value
+
+        # Renewing the lease reports the last use to the others
+        store.file.update(first._session_key, _idle)
+        second._lease_renewed -= 1000
+        assert await second.device_info()
+        first._sid_used -= 1000
+        assert await first.device_info()
+        assert first._sid == sid
+        assert requests["/dyn/login.json"] == 1
+
+        # Idle for too long, the expired sid is not taken from the store
+        store.file.update(first._session_key, _idle)
+        first._sid_used -= 1000
+        assert await first.device_info()
+        assert requests["/dyn/login.json"] == 2
+        assert first._sid != sid
+        # Still used by the second client
+        assert requests["/dyn/logout.json"] == 0
+
+        # Renewing the lease switches to the new session, the last to switch
+        # logs out the replaced one
+        second._lease_renewed -= 1000
+        assert await second.device_info()
+        assert second._sid == first._sid
+        assert requests["/dyn/login.json"] == 2
+        assert requests["/dyn/logout.json"] == 1
+        assert list(device.sessions) == [first._sid]
+
+        # The age of a shared session is kept in the store
+        def _age(value: Any) -> Any:
+            value["created"] -= 1000
+            return value
+
+        store.file.update(first._session_key, _age)
+        third = SMAWebConnect(
+            session, sim.urls[0], "pass", session_store=store, session_max_age=100
+        )
+        assert await third.device_info()
+        assert third._sid == first._sid
+        assert requests["/dyn/login.json"] == 2
+        assert await third.device_info()
+        assert third._sid != first._sid
+        assert requests["/dyn/login.json"] == 3
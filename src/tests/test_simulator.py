@@ -0,0 +1,146 @@
+"""Test the device simulator."""
+
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from pysma import (
+    DashboardReader,
+    SmaAuthenticationException,
+    SmaConnectionException,
+    SMAWebConnect,
+)
+from pysma.retry import RetryPolicy
+from pysma.simulator import Simulator
+
+from .conftest import SMA_TESTDATA, simulated_device
+
+
+async def test_devices() -> None:
+    """Test sensors are discovered and read from several devices."""
+    async with (
+        Simulator([simulated_device(), simulated_device()], seed=1) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        assert len(set(sim.urls)) == 2
+        for url in sim.urls:
+            sma = SMAWebConnect(session, url, "pass")
+            sensors = await sma.get_sensors()
+            assert len(sensors) == SMA_TESTDATA[0].values[2]
+            assert await sma.read(sensors)
+            assert sensors["grid_power"].value == 2460
+            await sma.close_session()
+
+        requests = sim.devices[0].requests
+        assert requests["/dyn/login.json"] == 1
+        assert requests["/dyn/getValues.json"] == 1
+        assert not sim.devices[0].sessions
+    assert sim.urls == []
+
+
+async def test_dashboard() -> None:
+    """Test the dashboard is served without login."""
+    async with (
+        Simulator([simulated_device(dash_keys=("6100_40263F00",))]) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        sensors = await SMAWebConnect(session, sim.urls[0], "pass").get_sensors()
+        reader = DashboardReader(SMAWebConnect(session, sim.urls[0]), sensors)
+        assert await reader.read()
+        assert sensors["grid_power"].value == 2460
+        assert [sen.name for sen in reader.resolved or []] == ["grid_power"]
+
+
+async def test_max_sessions() -> None:
+    """Test logins are refused when all sessions are used."""
+    async with (
+        Simulator([simulated_device(max_sessions=1)]) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        first = SMAWebConnect(session, sim.urls[0], "pass")
+        assert await first.new_session()
+        with pytest.raises(SmaAuthenticationException):
+            await SMAWebConnect(session, sim.urls[0], "pass").new_session()
+        with pytest.raises(SmaAuthenticationException):
+            await SMAWebConnect(session, sim.urls[0], "wrong").new_session()
+
+        await first.close_session()
+        assert await SMAWebConnect(session, sim.urls[0], "pass").new_session()
+
+
+async def test_session_timeout() -> None:
+    """Test expired sessions are replaced without failing the read."""
+    async with (
+        Simulator([simulated_device(session_timeout=0.05)]) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        requests = sim.devices[0].requests
+        sma = SMAWebConnect(session, sim.urls[0], "pass")
+        assert await sma.device_info()
+        reads = requests["/dyn/getValues.json"]
+        await asyncio.sleep(0.1)
+        # The device expired the session, the read is retried after login
+        assert await sma.device_info()
+        assert requests["/dyn/login.json"] == 2
+        assert requests["/dyn/getValues.json"] == 3 * reads
+
+        # Login before the device expires the session
+        sma.session_timeout = 0.04
+        await asyncio.sleep(0.1)
+        assert await sma.device_info()
+        assert requests["/dyn/login.json"] == 3
+        assert requests["/dyn/getValues.json"] == 4 * reads
+
+
+async def test_session_max_age() -> None:
+    """Test sessions replaced before they expire are logged out."""
+    async with (
+        Simulator([simulated_device(max_sessions=2)]) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        requests = sim.devices[0].requests
+        sma = SMAWebConnect(session, sim.urls[0], "pass", session_max_age=0.05)
+        for _ in range(5):
+            assert await sma.device_info()
+            await asyncio.sleep(0.06)
+        assert requests["/dyn/login.json"] == 5
+        assert requests["/dyn/logout.json"] == 4
+        assert len(sim.devices[0].sessions) == 1
+
+
+async def test_latency() -> None:
+    """Test replies are delayed."""
+    async with (
+        Simulator([simulated_device(latency=0.1, jitter=0.05)], seed=1) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        sma = SMAWebConnect(session, sim.urls[0], "pass")
+        start = time.monotonic()
+        await sma.read_dash_logger()
+        # Login and read
+        assert time.monotonic() - start >= 0.2
+
+
+async def test_disconnect() -> None:
+    """Test connections are dropped."""
+    async with (
+        Simulator([simulated_device(disconnect_rate=1)]) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        sma = SMAWebConnect(session, sim.urls[0], retry=RetryPolicy(attempts=1))
+        with pytest.raises(SmaConnectionException):
+            await sma.read_dash_logger()
+
+
+async def test_logger() -> None:
+    """Test log entries are served by range."""
+    entries = [{"t": t, "v": t // 300} for t in range(0, 3000, 300)]
+    async with (
+        Simulator([simulated_device(logger={28672: entries})]) as sim,
+        aiohttp.ClientSession() as session,
+    ):
+        sma = SMAWebConnect(session, sim.urls[0], "pass")
+        assert await sma.read_logger(28672, 600, 1200) == entries[2:5]
+        assert await sma.read_logger(28704, 600, 1200) == []
@@ -3,21 +3,29 @@
 import json
 import logging
 import re
-from collections.abc import Callable, Generator
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import aiohttp
 import pytest
-from aioresponses import aioresponses
+from aioresponses import CallbackResult, aioresponses
+from yarl import URL
 
 from pysma import (
+    JsonLayoutStore,
     SmaAuthenticationException,
     SmaConnectionException,
     SmaReadException,
     SMAWebConnect,
 )
 from pysma.definitions.webconnect import device_type as device_type_sensor
+from pysma.definitions.webconnect import grid_power, voltage_l1
+from pysma.recorder import SensorRecorder
 from pysma.sensor import Sensors
+from pysma.translations import clear_cache
 
 from .conftest import (
     MOCK_DEVICE,
@@ -25,14 +33,6 @@ from .conftest import (
     SMA_TESTDATA,
 )
 
-
-@pytest.fixture
-def mock_aioresponse() -> Generator[aioresponses, None, None]:
-    """Fixture for aioresponses."""
-    with aioresponses() as m:
-        yield m
-
-
 _LOG = logging.getLogger(__name__)
 
 
@@ -92,6 +92,25 @@ class Test_SMA_class:
         with pytest.raises(SmaConnectionException):
             await sma._get_json("/dummy-url")
 
+    async def test_decode_in_thread(self, mock_aioresponse: aioresponses) -> None:
+        """Test large replies are decoded in a thread."""
+        mock_aioresponse.get(f"{self.base_url}/small", body='{"a": 1}')
+        mock_aioresponse.get(f"{self.base_url}/large", body='{"a": 1, "b": 2}')
+        threads = []
+
+        def _loads(body: bytes) -> Any:
+            threads.append(threading.current_thread())
+            return json.loads(body)
+
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(
+            session, self.host, "pass", json_loads=_loads, decode_in_thread=10
+        )
+        assert await sma._get_json("/small") == {"a": 1}
+        assert await sma._get_json("/large") == {"a": 1, "b": 2}
+        assert threads[0] is threading.main_thread()
+        assert threads[1] is not threading.main_thread()
+
     @patch("pysma.sma_webconnect._LOG.warning")
     async def test_request_json_invalid_json(
         self,
@@ -136,9 +155,103 @@ class Test_SMA_class:
         session = aiohttp.ClientSession()
         sma = SMAWebConnect(session, self.host)
         sensors = Sensors(device_type_sensor)
+        recorder = SensorRecorder(sensors)
         assert await sma.read(sensors)
         assert sensors["6800_08822000"].value == "Sunny Boy 3.6"
         assert mock_warn.call_count == 0
+        assert len(recorder) == 1
+
+    async def test_read_changes(self, mock_aioresponse: aioresponses) -> None:
+        """Test read_changes returns the changed sensors."""
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/login.json", payload={"result": {"sid": "ABCD"}}
+        )
+        for power, voltage in ((1000, 2300), (1005, 2350), (1020, 2410)):
+            mock_aioresponse.post(
+                f"{self.base_url}/dyn/getValues.json?sid=ABCD",
+                payload={
+                    "result": {
+                        "0199-xxxxx385": {
+                            "6100_40263F00": {"1": [{"val": power}]},
+                            "6100_00464800": {"1": [{"val": voltage}]},
+                        }
+                    }
+                },
+            )
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(session, self.host, "pass")
+        sensors = Sensors([grid_power, voltage_l1])
+        sensors["voltage_l1"].enabled = True
+        deadbands = {"W": 10, "V": 1}
+
+        changes = await sma.read_changes(sensors, deadbands)
+        assert [(c.sensor.name, c.old, c.new) for c in changes] == [
+            ("grid_power", None, 1000),
+            ("voltage_l1", None, 23),
+        ]
+        changes = await sma.read_changes(sensors, deadbands)
+        assert [(c.sensor.name, c.old, c.new) for c in changes] == []
+        changes = await sma.read_changes(sensors, deadbands)
+        assert [(c.sensor.name, c.old, c.new) for c in changes] == [
+            ("grid_power", 1000, 1020),
+            ("voltage_l1", 23, 24.1),
+        ]
+
+    async def test_read_keeps_changes(self, mock_aioresponse: aioresponses) -> None:
+        """Test read does not report changes, so read_changes still sees them."""
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/login.json", payload={"result": {"sid": "ABCD"}}
+        )
+        for power in (1000, 1020, 1020):
+            mock_aioresponse.post(
+                f"{self.base_url}/dyn/getValues.json?sid=ABCD",
+                payload={
+                    "result": {
+                        "0199-xxxxx385": {"6100_40263F00": {"1": [{"val": power}]}}
+                    }
+                },
+            )
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(session, self.host, "pass")
+        sensors = Sensors(grid_power)
+
+        assert len(await sma.read_changes(sensors)) == 1
+        assert await sma.read(sensors)
+        assert sensors["grid_power"].value == 1020
+        changes = await sma.read_changes(sensors)
+        assert [(c.old, c.new) for c in changes] == [(1000, 1020)]
+
+    @patch("pysma.sma_webconnect._LOG.info")
+    async def test_read_decode_enabled_only(
+        self, mock_info: MagicMock, mock_aioresponse: aioresponses
+    ) -> None:
+        """Test read only decodes the values of enabled sensors."""
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getDashValues.json",
+            payload={
+                "result": {
+                    "0199-xxxxx385": {
+                        "6100_40263F00": {"1": [{"val": 1000}]},
+                        "6100_00464800": {"1": [{"val": 2300}]},
+                    }
+                }
+            },
+        )
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(session, self.host, decode_enabled_only=True)
+        sensors = Sensors([grid_power, voltage_l1])
+        read_body = sma._read_body
+        bodies = []
+
+        async def _read_body(*args: Any, **kwargs: Any) -> dict:
+            bodies.append(await read_body(*args, **kwargs))
+            return bodies[-1]
+
+        with patch.object(sma, "_read_body", _read_body):
+            assert await sma.read(sensors)
+        assert list(bodies[0]) == ["6100_40263F00"]
+        assert sensors["grid_power"].value == 1000
+        assert sensors["voltage_l1"].value is None
 
     @patch("pysma.sma_webconnect._LOG.warning")
     async def test_read_body_error(
@@ -147,7 +260,12 @@ class Test_SMA_class:
         """Test read_body with SmaReadException."""
         self.mock_login(mock_aioresponse)
         mock_aioresponse.post(
-            f"{self.base_url}/dyn/getValues.json?sid=ABCD", payload={"err": 401}
+            f"{self.base_url}/dyn/login.json", payload={"result": {"sid": "ABCD"}}
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getValues.json?sid=ABCD",
+            payload={"err": 401},
+            repeat=True,
         )
         session = aiohttp.ClientSession()
         sma = SMAWebConnect(session, self.host, "pass")
@@ -155,6 +273,102 @@ class Test_SMA_class:
         with pytest.raises(SmaReadException):
             await sma._read_body("/dyn/getValues.json", payload={"dummy": "payload"})
         assert mock_warn.call_count == 1
+        assert sma._sid is None
+
+    @patch("pysma.sma_webconnect._LOG.warning")
+    async def test_read_body_relogin(
+        self, mock_warn: MagicMock, mock_aioresponse: aioresponses
+    ) -> None:
+        """Test read_body logs in again and retries once after an error."""
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/login.json", payload={"result": {"sid": "EFGH"}}
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getValues.json?sid=ABCD", payload={"err": 401}
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getValues.json?sid=EFGH",
+            payload={"result": {"0199-xxxxx385": {"6100_40263F00": {"val": 1}}}},
+        )
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(session, self.host, "pass")
+        sma._sid = "ABCD"
+        body = await sma._read_body("/dyn/getValues.json", {"dummy": "payload"})
+        assert body == {"6100_40263F00": {"val": 1}}
+        assert sma._sid == "EFGH"
+        assert mock_warn.call_count == 0
+        # The expired session is not logged out
+        assert ("POST", URL(f"{self.base_url}/dyn/logout.json?sid=ABCD")) not in (
+            mock_aioresponse.requests
+        )
+
+    async def test_read_body_error_logout(self, mock_aioresponse: aioresponses) -> None:
+        """Test a session is logged out before retrying after other errors."""
+        mock_aioresponse.post(f"{self.base_url}/dyn/logout.json?sid=ABCD", payload={})
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/login.json", payload={"result": {"sid": "EFGH"}}
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getValues.json?sid=ABCD", payload={"err": 503}
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getValues.json?sid=EFGH",
+            payload={"result": {"0199-xxxxx385": {"6100_40263F00": {"val": 1}}}},
+        )
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(session, self.host, "pass")
+        sma._sid = "ABCD"
+        body = await sma._read_body("/dyn/getValues.json", {"dummy": "payload"})
+        assert body == {"6100_40263F00": {"val": 1}}
+        assert sma._sid == "EFGH"
+        assert ("POST", URL(f"{self.base_url}/dyn/logout.json?sid=ABCD")) in (
+            mock_aioresponse.requests
+        )
+
+    async def test_session_expired(self, mock_aioresponse: aioresponses) -> None:
+        """Test an idle or old session is replaced before reading."""
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/login.json",
+            payload={"result": {"sid": "ABCD"}},
+            repeat=True,
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getValues.json?sid=ABCD",
+            payload={"result": {"0199-xxxxx385": {}}},
+            repeat=True,
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/logout.json?sid=ABCD", payload={}, repeat=True
+        )
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(session, self.host, "pass", session_timeout=100)
+        logins = mock_aioresponse.requests
+
+        def _login_count() -> int:
+            return len(logins[("POST", URL(f"{self.base_url}/dyn/login.json"))])
+
+        def _logout_count() -> int:
+            logout = URL(f"{self.base_url}/dyn/logout.json?sid=ABCD")
+            return len(logins.get(("POST", logout), []))
+
+        await sma._read_body("/dyn/getValues.json", {})
+        await sma._read_body("/dyn/getValues.json", {})
+        assert _login_count() == 1
+
+        sma._sid_used -= 100
+        await sma._read_body("/dyn/getValues.json", {})
+        assert _login_count() == 2
+        # The replaced session is logged out, it may not have expired yet
+        assert _logout_count() == 1
+
+        sma.session_max_age = 100
+        await sma._read_body("/dyn/getValues.json", {})
+        assert _login_count() == 2
+        sma._sid_created -= 100
+        await sma._read_body("/dyn/getValues.json", {})
+        assert _login_count() == 3
+        assert _logout_count() == 2
+        await session.close()
 
     @patch("pysma.sma_webconnect._LOG.warning")
     async def test_read_body_unexpected(
@@ -248,6 +462,49 @@ class Test_SMA_class:
             {"t": 1622584800, "v": 4565355},
         ]
 
+    async def test_iter_logger(self, mock_aioresponse: aioresponses) -> None:
+        """Test iter_logger splits the range and removes duplicates."""
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/login.json", payload={"result": {"sid": "ABCD"}}
+        )
+        windows = []
+
+        def _logger(url: str, **kwargs: Any) -> CallbackResult:
+            payload = json.loads(kwargs["data"])
+            windows.append((payload["tStart"], payload["tEnd"]))
+            entries = [
+                {"t": t, "v": t // 500}
+                for t in range(
+                    -(-payload["tStart"] // 500) * 500, payload["tEnd"] + 1, 500
+                )
+            ]
+            # Entries are not guaranteed to be sorted
+            return CallbackResult(payload={"result": {"0199-xxxxx385": entries[::-1]}})
+
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getLogger.json?sid=ABCD",
+            callback=_logger,
+            repeat=True,
+        )
+
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(session, self.host, "pass")
+        entries = [
+            entry async for entry in sma.iter_logger(28672, 3000, 0, window=1000)
+        ]
+        assert [entry["t"] for entry in entries] == list(range(0, 3001, 500))
+        assert sorted(windows) == [(0, 1000), (1000, 2000), (2000, 3000)]
+
+        # Stop early
+        windows.clear()
+        async for entry in sma.iter_logger(28672, 0, 9000, window=1000):
+            assert entry["t"] == 0
+            break
+        assert len(windows) <= 3
+
+        with pytest.raises(ValueError):
+            await anext(sma.iter_logger(28672, 0, 9000, window=0))
+
     async def test_read_logger_error(self, mock_aioresponse: aioresponses) -> None:
         """Test read_logger with SmaReadException."""
         mock_aioresponse.post(
@@ -468,6 +725,111 @@ class Test_SMA_class:
         sma = SMAWebConnect(session, self.host, "pass")
         assert len(await sma.get_sensors()) == number_of_sensors
 
+    @pytest.mark.parametrize("parallel", [True, False])
+    @patch("pysma.sma_webconnect._LOG.warning")
+    async def test_get_sensors_fallback(
+        self,
+        mock_warn: MagicMock,
+        parallel: bool,
+        mock_aioresponse: aioresponses,
+    ) -> None:
+        """Test discovery is retried sequentially after a device error."""
+        get_all_onl_values, get_all_param_values, number_of_sensors = SMA_TESTDATA[
+            0
+        ].values
+        self.mock_login(mock_aioresponse)
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/login.json",
+            payload={"result": {"sid": "ABCD"}},
+            repeat=True,
+        )
+        # The error is repeated when retried after logging in again
+        for _ in range(2):
+            mock_aioresponse.post(
+                f"{self.base_url}/dyn/getAllOnlValues.json?sid=ABCD",
+                payload={"err": 503},
+            )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getAllOnlValues.json?sid=ABCD",
+            payload=get_all_onl_values,
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getAllParamValues.json?sid=ABCD",
+            payload=get_all_param_values,
+            repeat=True,
+        )
+
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(session, self.host, "pass", parallel_discovery=parallel)
+        if parallel:
+            assert len(await sma.get_sensors()) == number_of_sensors
+            assert mock_warn.call_count == 1
+        else:
+            with pytest.raises(SmaReadException):
+                await sma.get_sensors()
+
+    async def test_concurrent_login(self, mock_aioresponse: aioresponses) -> None:
+        """Test concurrent reads share a single login."""
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/login.json", payload={"result": {"sid": "ABCD"}}
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getAllOnlValues.json?sid=ABCD",
+            payload={"result": {"0199-xxxxx385": {"a": 1}}},
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getAllParamValues.json?sid=ABCD",
+            payload={"result": {"0199-xxxxx385": {"b": 2}}},
+        )
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(session, self.host, "pass")
+        assert await sma._read_all_sensors() == {"a": 1, "b": 2}
+
+    async def test_get_sensors_layout_store(
+        self, mock_aioresponse: aioresponses, tmp_path: Path
+    ) -> None:
+        """Test get_sensors restores a stored layout."""
+        get_all_onl_values, get_all_param_values, number_of_sensors = SMA_TESTDATA[
+            0
+        ].values
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/login.json",
+            payload={"result": {"sid": "ABCD"}},
+            repeat=True,
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getValues.json?sid=ABCD",
+            payload={
+                "result": {
+                    "0199-xxxxx385": {
+                        "6800_00A21E00": {"1": [{"val": MOCK_DEVICE.serial}]},
+                        "6800_00823400": {"1": [{"val": "1.2.3.R"}]},
+                    }
+                }
+            },
+            repeat=True,
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getAllOnlValues.json?sid=ABCD",
+            payload=get_all_onl_values,
+        )
+        mock_aioresponse.post(
+            f"{self.base_url}/dyn/getAllParamValues.json?sid=ABCD",
+            payload=get_all_param_values,
+        )
+
+        store = JsonLayoutStore(tmp_path / "layouts.json")
+        session = aiohttp.ClientSession()
+        sma = SMAWebConnect(session, self.host, "pass")
+        sensors = await sma.get_sensors(store)
+        assert len(sensors) == number_of_sensors
+        assert store.load(f"{MOCK_DEVICE.serial}_1.2.3.R")
+
+        # The getAll* requests are not repeated
+        sma = SMAWebConnect(session, self.host, "pass")
+        restored = await sma.get_sensors(store)
+        assert list(restored) == list(sensors)
+
     async def test_post_json(self) -> None:
         """Test _post_json method."""
         session = aiohttp.ClientSession()
@@ -506,26 +868,32 @@ class Test_SMA_class:
 
         def get_data_side_effect(package: str, resource: str) -> str | None:
             if resource.endswith("en-US.json"):
-                return json.dumps({"key": "value"})
+                return json.dumps({"461": "SMA", "461t": "SMA (description)"})
 
             return None
 
         mock_get_data.side_effect = get_data_side_effect
+        clear_cache()
 
         session = aiohttp.ClientSession()
         sma = SMAWebConnect(session, self.host, "pass", lang="de-CH")
 
-        l10n = await sma._read_l10n()
+        l10n = await sma.read_l10n()
 
         # Warning should be logged once
         mock_warn.assert_called_once()
         assert mock_get_data.call_count == 2
 
-        # Fallback language must be loaded
-        assert l10n
-        assert l10n["key"] == "value"
+        # Fallback language must be loaded, only tag ids are kept
+        assert l10n == {"461": "SMA"}
 
         # Verify the cached entry is returned on subsequent calls
-        l10n2 = await sma._read_l10n()
+        l10n2 = await sma.read_l10n()
         assert mock_get_data.call_count == 2
         assert l10n == l10n2
+
+        # Other instances share the loaded languages
+        sma2 = SMAWebConnect(session, self.host, "pass", lang="de-CH")
+        assert await sma2.read_l10n() is l10n
+        assert mock_get_data.call_count == 2
+        clear_cache()
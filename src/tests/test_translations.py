@@ -0,0 +1,90 @@
+"""Test pysma translations."""
+
+import threading
+import time
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pysma.const import DEFAULT_L10N_CACHE_SIZE
+from pysma.translations import (
+    cached_translations,
+    clear_cache,
+    get_translations,
+    set_cache_size,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache() -> Generator[None, None, None]:
+    """Start and end every test with an empty cache."""
+    clear_cache()
+    yield
+    set_cache_size(DEFAULT_L10N_CACHE_SIZE)
+    clear_cache()
+
+
+def test_get_translations() -> None:
+    """Test only tag ids are loaded, once."""
+    l10n = get_translations("en-US")
+    assert l10n["461"] == "SMA"
+    assert l10n["9402"] == "Sunny Boy 3.6"
+    assert all(key.isdigit() for key in l10n)
+    assert get_translations("en-US") is l10n
+    assert cached_translations("en-US") is l10n
+    with pytest.raises(TypeError):
+        l10n["461"] = "Other"  # type: ignore[index]
+
+
+def test_not_found() -> None:
+    """Test an unknown locale returns an empty dict."""
+    assert get_translations("xx-XX") == {}
+
+
+@patch("pysma.translations._LOG.warning")
+@patch("pkgutil.get_data", return_value=b"NOT JSON")
+def test_invalid(mock_get_data: MagicMock, mock_warn: MagicMock) -> None:
+    """Test an invalid language file returns an empty dict."""
+    assert get_translations("en-US") == {}
+    assert mock_warn.call_count == 1
+
+
+@patch("pysma.translations._load_from_package")
+def test_lru(mock_load: MagicMock) -> None:
+    """Test the least recently used locale is dropped."""
+    mock_load.side_effect = lambda locale: {"1": locale}
+    set_cache_size(2)
+    get_translations("de-DE")
+    get_translations("en-US")
+    get_translations("de-DE")
+    get_translations("fr-FR")
+    assert cached_translations("en-US") is None
+    assert cached_translations("de-DE") == {"1": "de-DE"}
+    assert mock_load.call_count == 3
+
+    set_cache_size(1)
+    assert cached_translations("fr-FR") is None
+    assert cached_translations("de-DE") == {"1": "de-DE"}
+    with pytest.raises(ValueError):
+        set_cache_size(0)
+
+
+@patch("pysma.translations._load_from_package")
+def test_concurrent_load(mock_load: MagicMock) -> None:
+    """Test concurrent first reads result in a single load."""
+    started = threading.Event()
+
+    def _slow_load(locale: str) -> dict[str, str]:
+        started.set()
+        time.sleep(0.05)
+        return {"1": locale}
+
+    mock_load.side_effect = _slow_load
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(get_translations, ["de-DE"] * 8))
+
+    assert started.is_set()
+    assert mock_load.call_count == 1
+    assert all(res is results[0] for res in results)